@@ -1,6 +1,17 @@
+import asyncio
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
 from enum import Enum
-from typing import TypedDict, List, Dict
+from typing import Callable, TypedDict, List, Dict, Optional
+from alive_players import AlivePlayers
+from callbacks import DECISION_TAG, CallUsage
+from checkpointing import register_thread
+from decision import astructured_decision, decision_mode, structured_decision
+from metrics import record_action
+from config import AGENT_STREAM_MODE
+from streaming import STREAM_MODES, TokenCallback, acollect_stream, collect_stream
+from scheduler import PRIORITY_TURN, PRIORITY_VOTE, llm_priority
+from tracing import span
 
 
 class PlayerStatus(Enum):
@@ -12,12 +23,20 @@ class GameState(TypedDict):
     phase: str  # "night", "day", "voting"
     day_count: int
     players: Dict[str, PlayerStatus]  # Mapping ids to status
-    alive_players: List[str]
+    alive_players: AlivePlayers
     last_eliminated: str
     last_night_victim: str
 
 
 class Player(ABC):
+    agent_executor = None
+    callbacks: list = []
+    on_token: Optional[TokenCallback] = None
+    game_id = ""
+    # Latency and token usage of the player's most recent action
+    last_call: dict = {}
+    _call_usage = None
+
     @abstractmethod
     def get_night_action(self, game_state: GameState):
         pass
@@ -26,6 +45,10 @@ class Player(ABC):
     def get_vote(self, game_state: GameState):
         pass
 
+    async def aget_vote(self, *args):
+        """Async vote; players without a native async path vote in a worker thread"""
+        return await asyncio.to_thread(self.get_vote, *args)
+
     @abstractmethod
     def take_turn(self, game_state: GameState):
         pass
@@ -37,3 +60,142 @@ class Player(ABC):
     @abstractmethod
     def get_user_id(self):
         pass
+
+    def agent_config(self, thread_id: str, tags: Optional[List[str]] = None) -> dict:
+        """Runnable config for one agent thread of this player in this game.
+
+        Agents are shared by every player of a role across games, so the
+        thread id is scoped by game and the player is identified by user_id.
+        """
+        scoped_thread_id = f"{self.game_id}/{thread_id}"
+        register_thread(self.game_id, scoped_thread_id)
+
+        return {
+            "configurable": {
+                "thread_id": scoped_thread_id,
+                "user_id": self.get_user_id(),
+                "game_id": self.game_id,
+            },
+            "callbacks": self.call_callbacks(),
+            "tags": tags or [],
+        }
+
+    def run_agent(
+        self,
+        messages: list,
+        thread_id: str,
+        tags: Optional[List[str]] = None,
+        phase: str = "other",
+        day: Optional[int] = None,
+    ) -> str:
+        """Run the agent on a thread and return the final message content.
+
+        phase and day label the call's token, tool-call and latency metrics.
+        """
+        with self._tracked_call(phase, day):
+            config = self.agent_config(thread_id, tags)
+            if AGENT_STREAM_MODE == "tokens":
+                events = self.agent_executor.stream(
+                    {"messages": messages}, config=config, stream_mode=STREAM_MODES
+                )
+                return collect_stream(events, self.get_user_id(), self.on_token)
+
+            response = ""
+            for event in self.agent_executor.stream(
+                {"messages": messages}, config=config, stream_mode="values"
+            ):
+                response = event["messages"][-1].content
+
+        return response
+
+    async def arun_agent(
+        self,
+        messages: list,
+        thread_id: str,
+        tags: Optional[List[str]] = None,
+        phase: str = "other",
+        day: Optional[int] = None,
+    ) -> str:
+        """Async counterpart of run_agent"""
+        with self._tracked_call(phase, day):
+            config = self.agent_config(thread_id, tags)
+            if AGENT_STREAM_MODE == "tokens":
+                events = self.agent_executor.astream(
+                    {"messages": messages}, config=config, stream_mode=STREAM_MODES
+                )
+                return await acollect_stream(events, self.get_user_id(), self.on_token)
+
+            response = ""
+            async for event in self.agent_executor.astream(
+                {"messages": messages}, config=config, stream_mode="values"
+            ):
+                response = event["messages"][-1].content
+
+        return response
+
+    def call_callbacks(self) -> list:
+        """Callbacks for a model call on this player's behalf"""
+        if self._call_usage is None:
+            return self.callbacks
+        return self.callbacks + [self._call_usage]
+
+    @contextmanager
+    def _tracked_call(self, phase: str, day: Optional[int]):
+        """Record the latency and token usage of one action in last_call and the metrics"""
+        self._call_usage = CallUsage()
+        # Ballots finish rounds already in progress, so they jump the rate limit queue
+        priority = PRIORITY_VOTE if phase.endswith("_vote") else PRIORITY_TURN
+        try:
+            with llm_priority(priority), span(
+                f"{self.role_name}:{phase}",
+                "turn",
+                track=self.get_user_id(),
+                player=self.get_user_id(),
+                day=day,
+            ):
+                yield
+        finally:
+            self.last_call = self._call_usage.summary()
+            self._call_usage = None
+            record_action(self.role_name, phase, day, self.last_call)
+
+    def decide(
+        self,
+        messages: list,
+        thread_id: str,
+        choices: List[str],
+        query: str,
+        parse: Callable[[str], object],
+        phase: str = "other",
+        day: Optional[int] = None,
+    ):
+        """Make a vote or decision and parse the answer.
+
+        In structured decision mode this is a single schema-constrained call
+        that must answer with one of choices, with retrieval for query done
+        up front; otherwise the tool-using agent answers in free text.
+        """
+        if decision_mode() == "structured":
+            with self._tracked_call(phase, day):
+                choice = structured_decision(self, messages, choices, query)
+            return parse(choice)
+        return parse(self.run_agent(messages, thread_id, [DECISION_TAG], phase, day))
+
+    async def adecide(
+        self,
+        messages: list,
+        thread_id: str,
+        choices: List[str],
+        query: str,
+        parse: Callable[[str], object],
+        phase: str = "other",
+        day: Optional[int] = None,
+    ):
+        """Async counterpart of decide"""
+        if decision_mode() == "structured":
+            with self._tracked_call(phase, day):
+                choice = await astructured_decision(self, messages, choices, query)
+            return parse(choice)
+        return parse(
+            await self.arun_agent(messages, thread_id, [DECISION_TAG], phase, day)
+        )
@@ -0,0 +1,97 @@
+import threading
+from typing import Dict, Optional
+
+from langchain_core.messages import SystemMessage
+from langchain_core.runnables import RunnableConfig, RunnableLambda
+from langchain_core.tools import tool
+from langgraph.prebuilt import create_react_agent
+
+from checkpointing import get_checkpointer
+from config import CHAT_MODEL
+from game_rag import GameRAG
+from models import get_shared_chat_model
+from utils import role_system_prompt
+
+# One compiled graph per (role, model) for each GameRAG; players only carry ids.
+# A plain dict: the graphs' tools hold their GameRAG, so its entry could never
+# expire anyway. Processes create one GameRAG and reuse it for every game.
+_agents: Dict[GameRAG, Dict] = {}
+_lock = threading.Lock()
+
+
+def get_agent(role: str, rag: GameRAG, model_name: str = CHAT_MODEL):
+    """Return the shared ReAct agent for a role ("villager" or "werewolf").
+
+    The player's identity is read from config["configurable"]["user_id"] at
+    run time, so every player of a role shares one graph and one pooled
+    model client. All graphs share the process-wide checkpointer.
+    """
+    with _lock:
+        agents = _agents.setdefault(rag, {})
+        key = (role, model_name)
+        if key not in agents:
+            agents[key] = create_react_agent(
+                get_shared_chat_model(model_name),
+                _build_tools(role, rag),
+                checkpointer=get_checkpointer(),
+                prompt=RunnableLambda(_identity_prompt(role)),
+            )
+        return agents[key]
+
+
+def _identity_prompt(role: str):
+    def prompt(state, config):
+        user_id = config["configurable"]["user_id"]
+        return [SystemMessage(content=role_system_prompt(role, user_id))] + state["messages"]
+
+    return prompt
+
+
+def _build_tools(role: str, rag: GameRAG):
+    @tool
+    def search_rules(query: str):
+        """Search for game rules and mechanics"""
+        docs = rag.similarity_search("rule", query, k=2)
+        return "\n\n".join([doc.page_content for doc in docs])
+
+    @tool
+    def search_villager_strategies(query: str):
+        """Search for villager strategies and tactics"""
+        docs = rag.similarity_search("villager", query, k=2)
+        return "\n\n".join([doc.page_content for doc in docs])
+
+    @tool
+    def search_werewolf_strategies(query: str):
+        """Search werewolf strategies"""
+        docs = rag.similarity_search("werewolf", query, k=2)
+        return "\n\n".join([doc.page_content for doc in docs])
+
+    @tool
+    def search_conversations(
+        query: str,
+        config: RunnableConfig,
+        day_from: Optional[int] = None,
+        day_to: Optional[int] = None,
+        phase: Optional[str] = None,
+        speaker: Optional[str] = None,
+    ):
+        """Search this game's conversations for relevant information.
+
+        Optionally restrict to a day range, a phase ("day") or one speaker.
+        More recent statements rank higher.
+        """
+        docs = rag.search_conversations(
+            query,
+            k=3,
+            game_id=config["configurable"].get("game_id"),
+            day_from=day_from,
+            day_to=day_to,
+            phase=phase,
+            speaker=speaker,
+        )
+        return "\n\n".join([doc.page_content for doc in docs])
+
+    strategy_tool = (
+        search_werewolf_strategies if role == "werewolf" else search_villager_strategies
+    )
+    return [search_rules, strategy_tool, search_conversations]
@@ -0,0 +1,62 @@
+from typing import Dict, Iterable, Iterator, List, Optional
+
+
+class AlivePlayers:
+    """Alive player ids as an ordered set, bucketed by role and seat order.
+
+    Membership, add and remove are O(1). Iteration follows the order
+    players joined, and repr() matches a list so prompts that show the
+    alive players read the same. with_role() and count() use per-role
+    buckets instead of scanning every player, and in_seat_order() caches
+    the alive players in discussion order until the next elimination.
+    """
+
+    def __init__(self, players: Iterable[str] = ()):
+        self._roles: Dict[str, str] = {}
+        self._buckets: Dict[str, Dict[str, None]] = {}
+        self._seats: List[str] = []
+        self._seated: Optional[List[str]] = None
+        for player_id in players:
+            self.add(player_id)
+
+    def add(self, player_id: str, role: str = ""):
+        self._roles[player_id] = role
+        self._buckets.setdefault(role, {})[player_id] = None
+        self._seated = None
+
+    def remove(self, player_id: str):
+        """Remove a player; raises KeyError if they are not alive"""
+        role = self._roles.pop(player_id)
+        del self._buckets[role][player_id]
+        self._seated = None
+
+    def role(self, player_id: str) -> str:
+        return self._roles[player_id]
+
+    def with_role(self, role: str) -> List[str]:
+        return list(self._buckets.get(role, ()))
+
+    def count(self, role: str) -> int:
+        return len(self._buckets.get(role, ()))
+
+    def seat(self, order: List[str]):
+        """Set the discussion order used by in_seat_order"""
+        self._seats = list(order)
+        self._seated = None
+
+    def in_seat_order(self) -> List[str]:
+        if self._seated is None:
+            self._seated = [p for p in self._seats if p in self._roles]
+        return list(self._seated)
+
+    def __contains__(self, player_id: object) -> bool:
+        return player_id in self._roles
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._roles)
+
+    def __len__(self) -> int:
+        return len(self._roles)
+
+    def __repr__(self) -> str:
+        return repr(list(self._roles))
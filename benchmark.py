@@ -0,0 +1,318 @@
+"""Benchmark complete games against the offline stub model.
+
+Reports wall time and LLM invocations per controller phase, GameRAG
+embedding and similarity-search counts, and process RSS as JSON.
+
+Usage:
+    python benchmark.py --games 5 --output bench.json
+    python benchmark.py --games 5 --compare bench.json --tolerance 0.2
+    python benchmark.py --chat-backend openai --llm-cache record   # then --llm-cache replay
+    python benchmark.py --games 1 --players 200 --werewolves 40    # large-game scaling
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+from functools import wraps
+from typing import Any, Dict, List, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from checkpointing import tracked_threads
+from config import PLAYER_NUM, WEREWOLF_NUM
+from controller import Controller
+from decision import calls_per_decision, calls_saved, decision_mode, set_decision_mode
+from embedding_cache import CachedEmbeddings
+from game_rag import GameRAG
+from main import add_strategy_knowledge, new_game_state, player_names
+from metrics import registry, write_snapshot
+from models import (
+    seed_stub_models,
+    set_backends,
+    set_llm_cache_mode,
+    set_replay_scope,
+    set_stub_throttle,
+)
+from scheduler import get_scheduler
+
+PHASES = [
+    "night_phase",
+    "werewolf_night_discussion",
+    "day_discussion",
+    "vote_to_continue_discussion",
+    "voting_phase",
+]
+
+
+class PhaseProfiler(BaseCallbackHandler):
+    """Times controller phases and attributes LLM calls to them.
+
+    Both wall time and LLM calls are inclusive: a call made inside
+    vote_to_continue_discussion also counts towards day_discussion.
+    """
+
+    def __init__(self):
+        self.active: List[str] = []
+        self.phases = {
+            phase: {"calls": 0, "wall_time": 0.0, "llm_calls": 0} for phase in PHASES
+        }
+
+    def instrument(self, controller: Controller):
+        for phase in PHASES:
+            setattr(controller, phase, self._timed(phase, getattr(controller, phase)))
+        controller.callbacks.append(self)
+
+    def _timed(self, phase: str, method):
+        @wraps(method)
+        def timed(*args, **kwargs):
+            self.active.append(phase)
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.phases[phase]["wall_time"] += time.perf_counter() - start
+                self.phases[phase]["calls"] += 1
+                self.active.remove(phase)
+
+        return timed
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages, **kwargs: Any):
+        for phase in self.active:
+            self.phases[phase]["llm_calls"] += 1
+
+
+def rss_mb() -> float:
+    with open("/proc/self/statm") as file:
+        pages = int(file.read().split()[1])
+    return pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_game(rag: GameRAG, seed: int, players: int, werewolves: int) -> Dict:
+    game_id = f"bench-{seed}"
+    seed_stub_models(seed)
+    set_replay_scope(game_id)
+    rag.use_conversation_namespace(f"conversation-{game_id}")
+    rag_before = dict(rag.stats)
+
+    game = Controller(rag, new_game_state(), game_id=game_id, seed=seed)
+    profiler = PhaseProfiler()
+    profiler.instrument(game)
+
+    start = time.perf_counter()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        game.setup_game(player_names(players), werewolves)
+        result = game.play_game()
+
+    return {
+        "seed": seed,
+        "winner": result["winner"],
+        "days": result["days"],
+        "wall_time": time.perf_counter() - start,
+        "llm_calls": result["llm_calls"],
+        "decisions": result["decisions"],
+        "decision_calls": result["decision_calls"],
+        "phases": profiler.phases,
+        "rag": {key: rag.stats[key] - rag_before[key] for key in rag.stats},
+        "rss_mb": rss_mb(),
+        "checkpoint_threads": tracked_threads(),
+    }
+
+
+def summarize(
+    games: List[Dict], setup: Dict, embedding_cache: Dict, retrieval_cache: Dict
+) -> Dict:
+    count = len(games)
+    phases = {}
+    for phase in PHASES:
+        calls = sum(game["phases"][phase]["calls"] for game in games)
+        wall_time = sum(game["phases"][phase]["wall_time"] for game in games)
+        llm_calls = sum(game["phases"][phase]["llm_calls"] for game in games)
+        phases[phase] = {
+            "calls_per_game": calls / count,
+            "wall_time_per_game": wall_time / count,
+            "wall_time_per_call": wall_time / calls if calls else 0.0,
+            "llm_calls_per_game": llm_calls / count,
+        }
+
+    return {
+        "games": count,
+        "wall_time_per_game": sum(game["wall_time"] for game in games) / count,
+        "llm_calls_per_game": sum(game["llm_calls"] for game in games) / count,
+        "decision_calls_per_decision": calls_per_decision(
+            sum(game["decisions"] for game in games),
+            sum(game["decision_calls"] for game in games),
+        ),
+        "phases": phases,
+        "rag_per_game": {
+            key: sum(game["rag"][key] for game in games) / count
+            for key in games[0]["rag"]
+        },
+        "setup": setup,
+        "embedding_cache": embedding_cache,
+        "retrieval_cache": retrieval_cache,
+        "rss_mb": rss_mb(),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def measured_calls_saved(games: List[Dict], baseline: Optional[Dict]) -> Optional[Dict]:
+    """Calls saved per game by structured decisions, against an agent-mode baseline report"""
+    if baseline is None or baseline.get("decision_mode") != "agent":
+        return None
+    agent_calls = baseline["summary"].get("decision_calls_per_decision")
+    if not agent_calls:
+        return None
+    saved = sum(
+        calls_saved(game["decisions"], game["decision_calls"], agent_calls) for game in games
+    )
+    return {"per_game": saved / len(games), "agent_calls_per_decision": agent_calls}
+
+
+def embedding_cache_stats(rag: GameRAG) -> Dict:
+    if isinstance(rag.embeddings, CachedEmbeddings):
+        return rag.embeddings.stats()
+    return {}
+
+
+def flatten_metrics(summary: Dict, prefix: str = "") -> Dict[str, float]:
+    """Flatten nested numeric metrics into dotted keys for comparison"""
+    metrics = {}
+    for key, value in summary.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            metrics.update(flatten_metrics(value, f"{name}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            metrics[name] = value
+    return metrics
+
+
+def compare(summary: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Metrics that grew by more than tolerance relative to the baseline"""
+    current = flatten_metrics(summary)
+    previous = flatten_metrics(baseline)
+    regressions = []
+    for name, value in sorted(current.items()):
+        if name == "games" or name not in previous or previous[name] <= 0:
+            continue
+        change = (value - previous[name]) / previous[name]
+        if change > tolerance:
+            regressions.append(
+                f"{name}: {previous[name]:.4g} -> {value:.4g} (+{change:.0%})"
+            )
+    return regressions
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark full Werewolf games")
+    parser.add_argument("--games", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chat-backend", default="stub", choices=["openai", "stub"])
+    parser.add_argument("--embedding-backend", default="hash", choices=["openai", "hash"])
+    parser.add_argument("--players", type=int, default=PLAYER_NUM)
+    parser.add_argument("--werewolves", type=int, default=WEREWOLF_NUM)
+    parser.add_argument("--decision-mode", choices=["agent", "structured"])
+    parser.add_argument(
+        "--llm-cache",
+        choices=["off", "record", "replay"],
+        help="Record chat responses, or replay recorded ones without calling a model",
+    )
+    parser.add_argument(
+        "--stub-throttle",
+        type=float,
+        help="Share of stub model calls that fail with HTTP 429, to exercise the scheduler",
+    )
+    parser.add_argument("--output", help="Write the JSON report to this path")
+    parser.add_argument(
+        "--metrics",
+        help="Write per role/phase/day token and latency metrics to this path "
+        "(Prometheus text for .prom/.txt, otherwise JSON)",
+    )
+    parser.add_argument(
+        "--compare",
+        help="Baseline JSON report to check against; an agent-mode baseline also "
+        "measures the model calls saved by structured decisions",
+    )
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    set_backends(args.chat_backend, args.embedding_backend)
+    set_decision_mode(args.decision_mode)
+    set_llm_cache_mode(args.llm_cache)
+    set_stub_throttle(args.stub_throttle)
+
+    start = time.perf_counter()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        rag = GameRAG()
+        add_strategy_knowledge(rag, new_game_state())
+    setup = {"wall_time": time.perf_counter() - start, **rag.stats}
+
+    games = [
+        run_game(rag, args.seed + index, args.players, args.werewolves)
+        for index in range(args.games)
+    ]
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            baseline = json.load(file)
+
+    report = {
+        "commit": git_commit(),
+        "backends": {"chat": args.chat_backend, "embeddings": args.embedding_backend},
+        "decision_mode": decision_mode(),
+        "players": args.players,
+        "werewolves": args.werewolves,
+        "summary": summarize(
+            games,
+            setup,
+            embedding_cache_stats(rag),
+            rag.retrieval_cache.stats() if rag.retrieval_cache else {},
+        ),
+        "llm_calls_saved": measured_calls_saved(games, baseline),
+        "games": games,
+        "scheduler": get_scheduler().stats(),
+        "metrics": registry.snapshot(),
+    }
+
+    if args.metrics:
+        write_snapshot(args.metrics)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(output)
+    else:
+        print(output)
+
+    if baseline is not None:
+        regressions = compare(report["summary"], baseline["summary"], args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
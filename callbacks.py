@@ -0,0 +1,108 @@
+import threading
+import time
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+
+# Tag on the runs of votes and decisions, so their calls can be counted apart
+DECISION_TAG = "decision"
+
+
+class LLMCallCounter(BaseCallbackHandler):
+    """Counts chat model invocations made by the agents of one game.
+
+    Runs tagged DECISION_TAG are also counted separately: decisions is the
+    number of votes and decisions made, decision_calls the model calls they
+    took.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.decisions = 0
+        self.decision_calls = 0
+        self._lock = threading.Lock()
+
+    def on_chain_start(
+        self,
+        serialized: Dict[str, Any],
+        inputs: Dict[str, Any],
+        *,
+        run_id: UUID,
+        parent_run_id: Optional[UUID] = None,
+        tags: Optional[List[str]] = None,
+        **kwargs: Any,
+    ):
+        if parent_run_id is None and DECISION_TAG in (tags or []):
+            with self._lock:
+                self.decisions += 1
+
+    def on_chat_model_start(
+        self, serialized: Dict[str, Any], messages: List[List[Any]], **kwargs: Any
+    ):
+        self._count(kwargs.get("tags"))
+
+    def on_llm_start(self, serialized: Dict[str, Any], prompts: List[str], **kwargs: Any):
+        self._count(kwargs.get("tags"))
+
+    def _count(self, tags: Optional[List[str]]):
+        with self._lock:
+            self.calls += 1
+            if DECISION_TAG in (tags or []):
+                self.decision_calls += 1
+
+
+class CallUsage(BaseCallbackHandler):
+    """Latency and token usage of the model calls made by one player action"""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.llm_calls = 0
+        self.llm_latency = 0.0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.tool_calls = 0
+        self._starts: Dict[UUID, float] = {}
+        self._lock = threading.Lock()
+
+    def on_chat_model_start(
+        self,
+        serialized: Dict[str, Any],
+        messages: List[List[Any]],
+        *,
+        run_id: UUID,
+        **kwargs: Any,
+    ):
+        with self._lock:
+            self._starts[run_id] = time.monotonic()
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any):
+        usage = {}
+        for generations in response.generations:
+            for generation in generations:
+                message = getattr(generation, "message", None)
+                usage = getattr(message, "usage_metadata", None) or usage
+
+        with self._lock:
+            started = self._starts.pop(run_id, None)
+            if started is not None:
+                self.llm_latency += time.monotonic() - started
+            self.llm_calls += 1
+            self.input_tokens += usage.get("input_tokens", 0)
+            self.output_tokens += usage.get("output_tokens", 0)
+
+    def on_tool_start(self, serialized: Dict[str, Any], input_str: str, **kwargs: Any):
+        with self._lock:
+            self.tool_calls += 1
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "latency": time.monotonic() - self.started,
+            "llm_latency": self.llm_latency,
+            "llm_calls": self.llm_calls,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "tool_calls": self.tool_calls,
+        }
@@ -0,0 +1,116 @@
+import asyncio
+import sqlite3
+import threading
+from collections import deque
+from typing import Dict, Set
+
+from langgraph.checkpoint.memory import MemorySaver
+
+from config import CHECKPOINT_DB_PATH, CHECKPOINT_RETAINED_GAMES, CHECKPOINTER_MODE
+
+_checkpointer = None
+_game_threads: Dict[str, Set[str]] = {}
+_finished_games: deque = deque()
+_lock = threading.Lock()
+
+
+def get_checkpointer(mode: str = CHECKPOINTER_MODE):
+    """Process-wide checkpointer shared by every agent graph.
+
+    "memory" keeps checkpoints in process, "sqlite" keeps them on disk and
+    "none" disables checkpointing. In every mode the threads of finished
+    games are evicted by release_game().
+    """
+    global _checkpointer
+    with _lock:
+        if _checkpointer is None and mode != "none":
+            _checkpointer = _create_checkpointer(mode)
+        return _checkpointer
+
+
+def register_thread(game_id: str, thread_id: str):
+    with _lock:
+        _game_threads.setdefault(game_id, set()).add(thread_id)
+
+
+def release_game(game_id: str, retained_games: int = CHECKPOINT_RETAINED_GAMES):
+    """Mark a game finished, evicting threads beyond the last retained_games games"""
+    with _lock:
+        _finished_games.append(game_id)
+        evicted = []
+        while len(_finished_games) > retained_games:
+            evicted.append(_finished_games.popleft())
+        threads = [t for game in evicted for t in _game_threads.pop(game, ())]
+
+    if _checkpointer is not None and threads:
+        _checkpointer.delete_threads(threads)
+
+
+def tracked_threads() -> int:
+    with _lock:
+        return sum(len(threads) for threads in _game_threads.values())
+
+
+class EvictingMemorySaver(MemorySaver):
+    """MemorySaver that deletes many threads in one pass.
+
+    delete_thread scans every stored write and blob, so calling it once per
+    thread is quadratic in the number of threads of a large game.
+    """
+
+    def delete_threads(self, thread_ids):
+        thread_ids = set(thread_ids)
+        for thread_id in thread_ids:
+            self.storage.pop(thread_id, None)
+        for store in (self.writes, self.blobs):
+            for key in [key for key in store if key[0] in thread_ids]:
+                del store[key]
+
+
+def _create_checkpointer(mode: str):
+    if mode == "memory":
+        return EvictingMemorySaver()
+
+    if mode == "sqlite":
+        try:
+            from langgraph.checkpoint.sqlite import SqliteSaver
+        except ImportError as error:
+            raise ImportError(
+                "CHECKPOINTER_MODE='sqlite' requires langgraph-checkpoint-sqlite"
+            ) from error
+
+        class ThreadedSqliteSaver(SqliteSaver):
+            """SqliteSaver whose async API runs the sync calls in worker threads,
+            so concurrent ballots (astream) can use it"""
+
+            async def aget_tuple(self, config):
+                return await asyncio.to_thread(self.get_tuple, config)
+
+            async def alist(self, config, **kwargs):
+                items = await asyncio.to_thread(lambda: list(self.list(config, **kwargs)))
+                for item in items:
+                    yield item
+
+            async def aput(self, *args, **kwargs):
+                return await asyncio.to_thread(self.put, *args, **kwargs)
+
+            async def aput_writes(self, *args, **kwargs):
+                return await asyncio.to_thread(self.put_writes, *args, **kwargs)
+
+            async def adelete_thread(self, thread_id: str):
+                return await asyncio.to_thread(self.delete_thread, thread_id)
+
+            def delete_threads(self, thread_ids):
+                """delete_thread for many threads in one transaction"""
+                rows = [(str(thread_id),) for thread_id in thread_ids]
+                with self.cursor() as cursor:
+                    cursor.executemany("DELETE FROM checkpoints WHERE thread_id = ?", rows)
+                    cursor.executemany("DELETE FROM writes WHERE thread_id = ?", rows)
+
+        connection = sqlite3.connect(
+            CHECKPOINT_DB_PATH, timeout=30, check_same_thread=False
+        )
+        connection.execute("PRAGMA journal_mode=WAL")
+        return ThreadedSqliteSaver(connection)
+
+    raise ValueError(f"Unknown checkpointer mode: {mode}")
@@ -0,0 +1,19 @@
+"""Remove duplicate chunks from the persistent Chroma stores in ./chroma_db.
+
+The collections are opened directly, whichever backend VECTOR_STORE_BACKENDS
+selects for them at runtime.
+
+Usage:
+    python compact_chroma.py
+"""
+
+from game_rag import compact_persistent_stores
+
+
+def main():
+    for store, removed in compact_persistent_stores().items():
+        print(f"{store}: removed {removed} duplicate chunks")
+
+
+if __name__ == "__main__":
+    main()
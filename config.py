@@ -1,4 +1,109 @@
+import os
+
 PLAYER_NUM = 8
 WEREWOLF_NUM = 2
 VILLAGER_NUM = 6
 MAX_DISCUSSION_CYCLE = 10
+
+# Prompt templates (PROMPTS_DIR/*.txt), compiled once; with a reload interval
+# (seconds) edited templates are picked up without a restart
+PROMPTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "prompts")
+PROMPT_RELOAD_INTERVAL = None
+
+# Ballots are independent, so they can be collected concurrently
+CONCURRENT_BALLOTS = True
+MAX_CONCURRENT_BALLOTS = 4
+
+# How agent runs are streamed: "values" keeps full state snapshots per step,
+# "tokens" streams model tokens and node updates (to the controller's on_token)
+AGENT_STREAM_MODE = "values"
+
+PLAYER_NAMES = ["Alice", "Bob", "Charlie", "Diana", "Eve", "Frank", "Carlos", "Potter"]
+
+CHAT_MODEL = "gpt-4o-mini"
+# "openai", or "stub" for an offline scripted/random model (load testing)
+CHAT_MODEL_BACKEND = os.environ.get("WEREWOLF_CHAT_BACKEND", "openai")
+# "openai", or "hash" for deterministic offline embeddings
+EMBEDDING_BACKEND = os.environ.get("WEREWOLF_EMBEDDING_BACKEND", "openai")
+STUB_TOOL_CALL_PROBABILITY = 0.3
+STUB_LATENCY = 0.0  # Simulated seconds per stub model call
+STUB_THROTTLE_PROBABILITY = 0.0  # Share of stub model calls failing with HTTP 429
+
+# Persistent embedding cache shared across runs; None disables it
+EMBEDDING_CACHE_PATH = "./embedding_cache.sqlite"
+EMBEDDING_CACHE_MAX_ENTRIES = 50000
+
+# Agent checkpoints: "memory", "sqlite" (on disk) or "none". Threads of
+# finished games are evicted beyond the last CHECKPOINT_RETAINED_GAMES.
+CHECKPOINTER_MODE = "memory"
+CHECKPOINT_DB_PATH = "./checkpoints.sqlite"
+CHECKPOINT_RETAINED_GAMES = 0
+
+# Token budget for the day's discussion in voting prompts; older cycles are
+# folded into a rolling summary ("llm" or "extractive") beyond it
+DISCUSSION_TOKEN_BUDGET = 2000
+DISCUSSION_SUMMARIZER = "llm"
+
+# Discussion statements are embedded in background batches
+CONVERSATION_FLUSH_BATCH_SIZE = 16
+CONVERSATION_FLUSH_INTERVAL = 0.5  # seconds
+
+# Memoized results for the static rule/strategy stores; 0 disables the cache.
+# A similarity (e.g. 0.95) also reuses results of near-identical queries.
+RETRIEVAL_CACHE_SIZE = 1024
+RETRIEVAL_CACHE_SIMILARITY = None
+
+# Vector store backend per store: "numpy" keeps a small corpus in an in-process
+# matrix, "chroma" uses Chroma (persistent for rules and strategies). A game's
+# conversations use numpy because its exact search ranks ties the same way every
+# run; Chroma returns a different subset of tied statements in each process.
+VECTOR_STORE_BACKENDS = {
+    "rule": "numpy",
+    "werewolf": "numpy",
+    "villager": "numpy",
+    "conversation": "numpy",
+}
+
+# Conversation search: relevance is multiplied by the decay once per day of age,
+# after ranking this many candidates per requested result
+CONVERSATION_RECENCY_DECAY = 0.7
+CONVERSATION_CANDIDATE_MULTIPLIER = 3
+
+# Votes and decisions: "agent" runs the tool-using ReAct agent, "structured" makes
+# one schema-constrained call with retrieval context injected up front
+DECISION_MODE = "agent"
+# Assumed model calls per agent-mode decision, only used for the *estimated* calls
+# saved when no measured agent-mode baseline is given (benchmark --compare)
+AGENT_CALLS_PER_DECISION = 2.0
+
+# Stop collecting continuation and werewolf night votes once the remaining
+# ballots cannot change the outcome; concurrent ballots are then sent in waves
+EARLY_BALLOT_TERMINATION = False
+
+# Debug mode: verify the controller's role index against every player's role and
+# status after each change and win check
+CHECK_INVARIANTS = os.environ.get("WEREWOLF_CHECK_INVARIANTS") == "1"
+
+# Chat responses: "record" stores every request/response in LLM_CACHE_PATH,
+# "replay" serves only stored responses without calling a model, "off" neither
+LLM_CACHE_MODE = os.environ.get("WEREWOLF_LLM_CACHE", "off")
+LLM_CACHE_PATH = "./llm_cache.sqlite"
+
+# Per-game JSONL event logs (EVENT_LOG_DIR/<game_id>.jsonl); None disables them
+EVENT_LOG_DIR = "./game_logs"
+EVENT_LOG_FLUSH_INTERVAL = 0.5
+
+# Per-game Chrome trace files (TRACE_DIR/<game_id>.trace.json); None disables tracing
+TRACE_DIR = None
+
+# Every chat request goes through a shared scheduler: requests and tokens per
+# minute per "<backend>/<model>" ("<backend>/default" applies to the backend's
+# unlisted models; omitted = unlimited, so the offline stub runs at full speed),
+# and retries of throttled (429) requests with jittered exponential backoff
+SCHEDULER_ENABLED = True
+RATE_LIMITS = {
+    "openai/gpt-4o-mini": {"requests_per_minute": 500, "tokens_per_minute": 200000},
+}
+SCHEDULER_MAX_RETRIES = 6
+SCHEDULER_BACKOFF_BASE = 0.5  # Seconds before the first retry, doubled per attempt
+SCHEDULER_BACKOFF_MAX = 30.0
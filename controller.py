@@ -1,36 +1,113 @@
+import asyncio
+import uuid
 from game_rag import GameRAG
 from Player import Player, GameState, PlayerStatus
-from typing import Dict, List
+from typing import Callable, Dict, List, Optional
 import random
+from callbacks import LLMCallCounter
+from checkpointing import release_game
+from models import run_async
+from transcript import Transcript
+from discussion_context import DiscussionContext, create_summarizer
+from decision import calls_saved
+from event_log import EventLog
+from prompt_registry import render_prompt
+from role_index import RoleIndex
+from tracing import TraceCallback, span, traced, tracing
+from streaming import TokenCallback
 from werewolf import Werewolf
 from villager import Villager
 from langchain_core.messages import SystemMessage, HumanMessage
-from config import VILLAGER_NUM, PLAYER_NUM, WEREWOLF_NUM, MAX_DISCUSSION_CYCLE
+from config import (
+    AGENT_STREAM_MODE,
+    WEREWOLF_NUM,
+    MAX_DISCUSSION_CYCLE,
+    CONCURRENT_BALLOTS,
+    MAX_CONCURRENT_BALLOTS,
+    EARLY_BALLOT_TERMINATION,
+    CHECK_INVARIANTS,
+    TRACE_DIR,
+)
+
+# Structured continuation ballots answer with one of these; both parse as themselves
+CONTINUATION_CHOICES = ["continue", "voting"]
+CONTINUATION_QUERY = "when to stop discussing and move to the vote"
+
+
+
+def continuation_decided(votes: Dict[str, str], remaining: int) -> bool:
+    """True once the remaining ballots cannot change the continuation vote"""
+    continue_votes = sum(1 for vote in votes.values() if vote == "continue")
+    voting_votes = sum(1 for vote in votes.values() if vote == "voting")
+    # Ties continue the discussion
+    return (
+        voting_votes > continue_votes + remaining
+        or continue_votes >= voting_votes + remaining
+    )
+
+
+def plurality_decided(votes: Dict[str, Optional[str]], remaining: int) -> bool:
+    """True once the leading target cannot be caught by the remaining ballots"""
+    tally: Dict[str, int] = {}
+    for target in votes.values():
+        if target:
+            tally[target] = tally.get(target, 0) + 1
+    counts = sorted(tally.values(), reverse=True)
+    if not counts:
+        return False
+    runner_up = counts[1] if len(counts) > 1 else 0
+    return counts[0] > runner_up + remaining
 
 
 class Controller:
-    def __init__(self, rag: GameRAG, game_state: GameState):
+    def __init__(
+        self,
+        rag: GameRAG,
+        game_state: GameState,
+        game_id: Optional[str] = None,
+        seed: Optional[int] = None,
+        on_token: Optional[TokenCallback] = None,
+    ):
         self.rag = rag
         self.players: Dict[str, Player] = {}
         self.player_order: List[str] = []
         self.game_state: GameState = game_state
+        self.roles = RoleIndex(game_state["alive_players"])
+        self.game_id = game_id or uuid.uuid4().hex[:12]
+        self.rng = random.Random(seed)
+        # Receives players' reply tokens as they stream (AGENT_STREAM_MODE "tokens")
+        self.on_token = on_token
+        self.llm_counter = LLMCallCounter()
+        self.callbacks = [self.llm_counter]
+        if TRACE_DIR:
+            self.callbacks.append(TraceCallback())
+        self.summarizer = create_summarizer(self.callbacks)
+        self.events = EventLog.for_game(self.game_id)
 
     def add_player(self, player: Player):
         """Add player to the game"""
+        player.callbacks = self.callbacks
+        player.game_id = self.game_id
+        player.on_token = self.on_token
         self.players[player.get_user_id()] = player
         self.game_state["players"][player.get_user_id()] = (
             PlayerStatus.ALIVE
         )  # Fixed missing ()
-        self.game_state["alive_players"].append(player.get_user_id())
-
-    def setup_game(self, player_names: List[str]):
-        """Setup game with given player number"""
-        if len(player_names) != PLAYER_NUM:  # Fixed number
-            raise ValueError(f"Need exactly {PLAYER_NUM} players")
+        self.roles.add(player.get_user_id(), player.role_name)
+        self._check_invariants()
+
+    def setup_game(self, player_names: List[str], werewolf_num: int = WEREWOLF_NUM):
+        """Setup game with the given players, werewolf_num of them werewolves"""
+        if not 0 < werewolf_num < len(player_names) - werewolf_num:
+            raise ValueError(
+                f"{werewolf_num} werewolves need more than {werewolf_num} villagers"
+            )
 
-        werewolf_players = random.sample(player_names, WEREWOLF_NUM)
+        self.rag.use_roster(len(player_names), werewolf_num)
+        werewolf_players = set(self.rng.sample(player_names, werewolf_num))
         self.player_order = player_names.copy()
-        random.shuffle(self.player_order)
+        self.rng.shuffle(self.player_order)
+        self.game_state["alive_players"].seat(self.player_order)
 
         print("==== GAME SETUP ====")
         for name in player_names:
@@ -42,19 +119,24 @@ class Controller:
                 print(f"{name} is a villager")
 
         print(f"\nDiscussion order: {' -> '.join(self.player_order)}")
+        self.events.emit(
+            "setup",
+            roles={p: self.players[p].role_name for p in player_names},
+            order=self.player_order,
+        )
 
+    @traced("phase")
     def werewolf_night_discussion(self):
         print("\n--- Werewolf Discussion ---")
 
-        alive_werewolves = [
-            player_id
-            for player_id in self.game_state["alive_players"]
-            if self.players[player_id].role_name == "werewolf"  # Fixed method call
-        ]
+        alive_werewolves = self.game_state["alive_players"].with_role("werewolf")
 
         if len(alive_werewolves) < 2:
             werewolf = self.players[alive_werewolves[0]]
-            target = werewolf.get_night_action(self.game_state)
+            target = werewolf.get_night_action(
+                self.game_state, [], self.roles.night_targets()
+            )
+            self._log_ballot("night", alive_werewolves[0], target)
             if target:
                 print(
                     f"Remaining werewolf {alive_werewolves[0]} chooses to eliminate {target}"  # Fixed space
@@ -62,79 +144,108 @@ class Controller:
 
             return target
 
-        werewolf_discussion = []
+        werewolf_discussion = Transcript()
 
         for werewolf_id in alive_werewolves:
             werewolf = self.players[werewolf_id]
-            teammates = [w for w in alive_werewolves if w != werewolf_id]
+            teammates = self.roles.teammates(werewolf_id)
 
             response = werewolf.discuss_night_target(
-                self.game_state, teammates, werewolf_discussion
+                self.game_state, teammates, werewolf_discussion, self.roles.night_targets()
             )
 
-            werewolf_discussion.append({"player": werewolf_id, "message": response})
-
-            print(f"{werewolf_id}: {response}")
+            werewolf_discussion.append(werewolf_id, response)
+            self._log_statement(werewolf_id, response)
+            self._print_statement(werewolf_id, response)
 
         print("\n--- Final Decision ---")
         werewolf_votes = {}
 
-        for werewolf_id in alive_werewolves:
-            werewolf = self.players[werewolf_id]
-
-            discussion_context = "\n".join([
-                f"{stmt['player']}: {stmt['message']}" for stmt in werewolf_discussion
-            ])
-
-            potential_targets = [
-                p
-                for p in self.game_state["alive_players"]
-                if self.players[p].role_name != "werewolf"  # Fixed method call
-            ]
+        discussion_context = werewolf_discussion.full()
+        potential_targets = self.roles.night_targets()
+        query = "which villager to eliminate at night"
 
-            system_prompt = f"""Based on your team discussion, make your final choice for who to eliminate.
-            
-            Discussion summary:
-                {discussion_context}
-
-            Choose one player from: {potential_targets}
-
-            Respond with just the player name.
-            """
-
-            config = {
-                "configurable": {
-                    "thread_id": f"werewolf_vote_{werewolf_id}_night_{self.game_state['day_count']}"
-                }
-            }
+        def parse_target(werewolf: Player):
+            def parse(response: str):
+                target = werewolf._extract_target(
+                    response, self.game_state["alive_players"]
+                )
+                if target and self.players[target].role_name != "werewolf":
+                    return target
+                return None
 
-            messages = [  # Fixed variable name
-                SystemMessage(content=system_prompt),
-                HumanMessage(content="Your final vote?"),
-            ]
+            return parse
 
-            for event in werewolf.agent_executor.stream(
-                {"messages": messages}, config=config, stream_mode="values"
-            ):
-                vote_response = event["messages"][-1].content
+        def ballot(werewolf_id: str):
+            werewolf = self.players[werewolf_id]
+            messages, thread_id = self._final_night_vote_messages(
+                werewolf_id, discussion_context, potential_targets
+            )
+            return werewolf.decide(
+                messages,
+                thread_id,
+                potential_targets,
+                query,
+                parse_target(werewolf),
+                phase="night_vote",
+                day=self.game_state["day_count"],
+            )
 
-            target = werewolf._extract_target(
-                vote_response, self.game_state["alive_players"]
+        async def aballot(werewolf_id: str):
+            werewolf = self.players[werewolf_id]
+            messages, thread_id = self._final_night_vote_messages(
+                werewolf_id, discussion_context, potential_targets
+            )
+            return await werewolf.adecide(
+                messages,
+                thread_id,
+                potential_targets,
+                query,
+                parse_target(werewolf),
+                phase="night_vote",
+                day=self.game_state["day_count"],
             )
 
-            if (
-                target and self.players[target].role_name != "werewolf"
-            ):  # Fixed method call
+        ballots = self._collect_ballots(
+            alive_werewolves, ballot, aballot, plurality_decided
+        )
+
+        for werewolf_id in alive_werewolves:
+            target = ballots.get(werewolf_id)
+            if werewolf_id in ballots:
+                self._log_ballot("night", werewolf_id, target)
+            if target:
                 werewolf_votes[werewolf_id] = target
                 print(f"{werewolf_id} votes to eliminate {target}")
 
         if werewolf_votes:  # Fixed indentation
             votes = list(werewolf_votes.values())
-            victim = max(set(votes), key=votes.count)
-            return victim
+            most_votes = max(votes.count(target) for target in votes)
+            # Seeded tie-break; iterating a set would depend on PYTHONHASHSEED
+            tied = sorted({target for target in votes if votes.count(target) == most_votes})
+            return self.rng.choice(tied)
 
         return None
 
+    def _final_night_vote_messages(
+        self, werewolf_id: str, discussion_context: str, potential_targets: List[str]
+    ):
+        system_prompt = render_prompt(
+            "werewolf_final_vote",
+            conversation=discussion_context,
+            targets=potential_targets,
+        )
+
+        thread_id = f"werewolf_vote_{werewolf_id}_night_{self.game_state['day_count']}"
+
+        messages = [  # Fixed variable name
+            SystemMessage(content=system_prompt),
+            HumanMessage(content="Your final vote?"),
+        ]
+
+        return messages, thread_id
+
+    @traced("phase")
     def night_phase(self):
         """Execute night phase with werewolf discussion"""
         print(f"\n{'=' * 50}")
@@ -143,6 +254,7 @@ class Controller:
         self.game_state["phase"] = "night"
 
         victim = self.werewolf_night_discussion()
+        self.events.emit("night_target", day=self.game_state["day_count"], target=victim)
 
         if victim:
             self.eliminate_player(victim)
@@ -152,60 +264,45 @@ class Controller:
             print("\nNo one was eliminated tonight.")
             self.game_state["last_night_victim"] = ""
 
+    @traced("phase")
     def vote_to_continue_discussion(self, cycle_num: int) -> bool:
         """Ask all players if they want to continue discussion or move to voting"""
         print(f"\n--- DISCUSSION CONTINUATION VOTE (Cycle {cycle_num}) ---")
 
-        votes = {}
-        alive_in_order = [
-            p for p in self.player_order if p in self.game_state["alive_players"]
-        ]
+        alive_in_order = self.game_state["alive_players"].in_seat_order()
+
+        def ballot(player_id: str):
+            messages, thread_id = self._continuation_vote_messages(player_id, cycle_num)
+            return self.players[player_id].decide(
+                messages,
+                thread_id,
+                CONTINUATION_CHOICES,
+                CONTINUATION_QUERY,
+                self._parse_continuation_vote,
+                phase="continuation_vote",
+                day=self.game_state["day_count"],
+            )
 
-        for player_id in alive_in_order:
-            player = self.players[player_id]
-
-            # Simple prompt asking if they want to continue discussion
-            system_prompt = f"""DISCUSSION CONTINUATION VOTE - Day {self.game_state["day_count"]}, After Cycle {cycle_num}
-
-            Game State:
-                - Alive players: {self.game_state["alive_players"]}
-                - Discussion cycles completed: {cycle_num}
-                - Maximum cycles allowed: {MAX_DISCUSSION_CYCLE}
-
-            Task: Decide if you want to continue discussion or move to voting phase.
-            Respond with either "continue discussion" or "move to voting".
-            """
-
-            config = {
-                "configurable": {
-                    "thread_id": f"{player.role_name}_{player_id}_continue_vote_day_{self.game_state['day_count']}_cycle_{cycle_num}"
-                }
-            }
-
-            messages = [
-                SystemMessage(content=system_prompt),
-                HumanMessage(
-                    content="Do you want to continue discussion or move to voting?"
-                ),
-            ]
+        async def aballot(player_id: str):
+            messages, thread_id = self._continuation_vote_messages(player_id, cycle_num)
+            return await self.players[player_id].adecide(
+                messages,
+                thread_id,
+                CONTINUATION_CHOICES,
+                CONTINUATION_QUERY,
+                self._parse_continuation_vote,
+                phase="continuation_vote",
+                day=self.game_state["day_count"],
+            )
 
-            for event in player.agent_executor.stream(
-                {"messages": messages}, config=config, stream_mode="values"
-            ):
-                response = event["messages"][-1].content
-
-            # Extract the decision
-            response_lower = response.lower()
-            if "move to voting" in response_lower or "voting" in response_lower:
-                vote = "voting"
-            elif "continue" in response_lower:
-                vote = "continue"
-            else:
-                # Default to continue if unclear
-                vote = "continue"
+        votes = self._collect_ballots(
+            alive_in_order, ballot, aballot, continuation_decided
+        )
 
-            votes[player_id] = vote
-            print(f"{player_id}: {vote}")
+        for player_id in alive_in_order:
+            print(f"{player_id}: {votes.get(player_id, 'skipped')}")
+            if player_id in votes:
+                self._log_ballot("continue", player_id, votes[player_id], cycle_num)
 
         # Count votes
         continue_votes = sum(1 for vote in votes.values() if vote == "continue")
@@ -223,6 +320,104 @@ class Controller:
             print("Majority voted to continue discussion.")
             return True
 
+    def _continuation_vote_messages(self, player_id: str, cycle_num: int):
+        player = self.players[player_id]
+
+        system_prompt = render_prompt(
+            "continuation_vote",
+            day_count=self.game_state["day_count"],
+            cycle_num=cycle_num,
+            alive_players=self.game_state["alive_players"],
+            max_cycles=MAX_DISCUSSION_CYCLE,
+        )
+
+        thread_id = f"{player.role_name}_{player_id}_continue_vote_day_{self.game_state['day_count']}_cycle_{cycle_num}"
+
+        messages = [
+            SystemMessage(content=system_prompt),
+            HumanMessage(content="Do you want to continue discussion or move to voting?"),
+        ]
+
+        return messages, thread_id
+
+    def _parse_continuation_vote(self, response: str) -> str:
+        """Extract the decision from a continuation vote response"""
+        response_lower = response.lower()
+        if "move to voting" in response_lower or "voting" in response_lower:
+            return "voting"
+        elif "continue" in response_lower:
+            return "continue"
+        # Default to continue if unclear
+        return "continue"
+
+    def _collect_ballots(
+        self,
+        player_ids: List[str],
+        ballot: Callable,
+        aballot: Callable,
+        decided: Optional[Callable[[Dict[str, object], int], bool]] = None,
+    ) -> Dict[str, object]:
+        """Collect one ballot per player, concurrently when enabled.
+
+        Results are keyed by player id so callers can report and tally them
+        in seating order regardless of completion order. With
+        EARLY_BALLOT_TERMINATION, decided(ballots so far, ballots remaining)
+        is checked after each ballot (or each concurrent wave), and players
+        not yet asked once it returns True are skipped and left out.
+        """
+        if not (EARLY_BALLOT_TERMINATION and decided):
+            decided = None
+        concurrent = CONCURRENT_BALLOTS and len(player_ids) > 1
+        if concurrent:
+            try:
+                asyncio.get_running_loop()
+                concurrent = False
+            except RuntimeError:
+                pass
+
+        if concurrent and decided is None:
+            results = run_async(self._gather_ballots(player_ids, aballot))
+            return dict(zip(player_ids, results))
+
+        wave_size = MAX_CONCURRENT_BALLOTS if concurrent else 1
+        ballots: Dict[str, object] = {}
+        for start in range(0, len(player_ids), wave_size):
+            wave = player_ids[start : start + wave_size]
+            if concurrent and len(wave) > 1:
+                results = run_async(self._gather_ballots(wave, aballot))
+            else:
+                results = [ballot(player_id) for player_id in wave]
+            ballots.update(zip(wave, results))
+
+            remaining = len(player_ids) - len(ballots)
+            if decided and remaining and decided(ballots, remaining):
+                skipped = player_ids[len(ballots) :]
+                print(f"Outcome decided; skipped ballots: {', '.join(skipped)}")
+                self.events.emit(
+                    "ballots_skipped", day=self.game_state["day_count"], players=skipped
+                )
+                break
+
+        return ballots
+
+    async def _gather_ballots(self, player_ids: List[str], aballot: Callable):
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_BALLOTS)
+
+        async def limited(player_id: str):
+            async with semaphore:
+                return await aballot(player_id)
+
+        tasks = [asyncio.ensure_future(limited(player_id)) for player_id in player_ids]
+        try:
+            return await asyncio.gather(*tasks)
+        except BaseException:
+            # Stop the other ballots (and close their streams) before the error leaves the loop
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+    @traced("phase")
     def day_discussion(self):
         """Dynamic discussion with voting to continue after each cycle"""
         print(f"\n{'=' * 50}")
@@ -230,10 +425,9 @@ class Controller:
         print(f"{'=' * 50}")
         self.game_state["phase"] = "day"
 
-        all_statements = []
-        alive_in_order = [
-            p for p in self.player_order if p in self.game_state["alive_players"]
-        ]
+        all_statements = Transcript()
+        discussion = DiscussionContext(all_statements, summarizer=self.summarizer)
+        alive_in_order = self.game_state["alive_players"].in_seat_order()
 
         cycle_num = 1
 
@@ -254,13 +448,15 @@ class Controller:
                         self.game_state, cycle_num, all_statements
                     )
 
-                all_statements.append({
-                    "player": player_id,
-                    "message": statement,
-                    "cycle": cycle_num,
-                })
+                all_statements.append(player_id, statement, cycle_num)
+                self.rag.add_statement(
+                    player_id, statement, self.game_state, cycle_num, self.game_id
+                )
+                self._log_statement(player_id, statement, cycle_num)
+                self._print_statement(player_id, statement)
 
-                print(f"{player_id}: {statement}")
+            # Fold older cycles into the shared summary once they exceed the budget
+            discussion.compact()
 
             # After each cycle, vote on whether to continue
             if cycle_num >= MAX_DISCUSSION_CYCLE:
@@ -277,32 +473,37 @@ class Controller:
 
             cycle_num += 1
 
-        # Store conversation history
-        discussion_summary = {
-            stmt["player"]: stmt["message"] for stmt in all_statements
-        }
-        self.rag.add_conversations(discussion_summary, self.game_state)
-
-        return all_statements
+        return discussion
 
-    def voting_phase(self, discussion_history: List[Dict[str, str]]):
+    @traced("phase")
+    def voting_phase(self, discussion_history: DiscussionContext):
         """Execute voting phase after discussion"""
         print("\n--- VOTING PHASE ---")
         self.game_state["phase"] = "voting"
 
         votes = {}
-        alive_in_order = [
-            p for p in self.player_order if p in self.game_state["alive_players"]
-        ]
+        alive_in_order = self.game_state["alive_players"].in_seat_order()
+
+        # Render (and summarize) the day once, before voters read it concurrently
+        discussion_history.render()
+        # Make sure today's statements are searchable before anyone votes
+        self.rag.flush_conversations()
+
+        def ballot_args(player_id: str):
+            targets = self.roles.targets(player_id)
+            if self.players[player_id].role_name == "villager":
+                return (self.game_state, discussion_history, targets)
+            return (self.game_state, self.get_werewolf_teammate(player_id), targets)
+
+        ballots = self._collect_ballots(
+            alive_in_order,
+            lambda player_id: self.players[player_id].get_vote(*ballot_args(player_id)),
+            lambda player_id: self.players[player_id].aget_vote(*ballot_args(player_id)),
+        )
 
         for player_id in alive_in_order:
-            player = self.players[player_id]
-
-            if player.role_name == "villager":
-                vote = player.get_vote(self.game_state, discussion_history)
-            else:
-                teammates = self.get_werewolf_teammate(player_id)
-                vote = player.get_vote(self.game_state, teammates)
+            vote = ballots[player_id]
+            self._log_ballot("day", player_id, vote)
 
             if vote and vote in self.game_state["alive_players"] and vote != player_id:
                 votes[player_id] = vote
@@ -319,7 +520,7 @@ class Controller:
             candidates = [
                 player for player, count in vote_counts.items() if count == max_votes
             ]
-            eliminated = random.choice(candidates)
+            eliminated = self.rng.choice(candidates)
 
             print(f"\nVote results: {vote_counts}")
             self.eliminate_player(eliminated)
@@ -334,27 +535,83 @@ class Controller:
     def eliminate_player(self, player_id: str):
         """Remove player from game"""
         self.game_state["players"][player_id] = PlayerStatus.DEAD
-        self.game_state["alive_players"].remove(player_id)
+        self.roles.remove(player_id)
+        self._check_invariants()
+        self.events.emit(
+            "elimination",
+            day=self.game_state["day_count"],
+            phase=self.game_state["phase"],
+            player=player_id,
+            role=self.players[player_id].role_name,
+        )
+
+    def _log_statement(self, player_id: str, statement: str, cycle: Optional[int] = None):
+        self.events.emit(
+            "statement",
+            day=self.game_state["day_count"],
+            phase=self.game_state["phase"],
+            cycle=cycle,
+            player=player_id,
+            text=statement,
+            llm=self.players[player_id].last_call,
+        )
+
+    def _print_statement(self, player_id: str, statement: str):
+        # A streamed reply was already printed token by token as it arrived
+        if self.on_token is None or AGENT_STREAM_MODE != "tokens":
+            print(f"{player_id}: {statement}")
+
+    def _log_ballot(
+        self, kind: str, player_id: str, vote: object, cycle: Optional[int] = None
+    ):
+        self.events.emit(
+            "ballot",
+            kind=kind,
+            day=self.game_state["day_count"],
+            cycle=cycle,
+            player=player_id,
+            vote=vote,
+            llm=self.players[player_id].last_call,
+        )
 
     def check_game_end(self):
         """Check if game has ended and return winner"""
-        alive_players = self.game_state["alive_players"]
-        werewolves = [
-            p for p in alive_players if self.players[p].role_name == "werewolf"
-        ]
-        villagers = [
-            p for p in alive_players if self.players[p].role_name == "villager"
-        ]
-
-        if not werewolves:
-            return "villagers"
-        elif len(werewolves) >= len(villagers):
-            return "werewolves"
-        return None
+        self._check_invariants()
+        return self.roles.winner()
+
+    def _check_invariants(self):
+        if CHECK_INVARIANTS:
+            self.roles.check(
+                {p: player.role_name for p, player in self.players.items()},
+                self.game_state["players"],
+            )
 
     def play_game(self):
+        """Play until one side wins and return a summary of the game"""
+        with tracing(self.game_id), span("game", "game", game_id=self.game_id):
+            try:
+                return self._play_game()
+            except BaseException as error:
+                self.events.emit(
+                    "game_error",
+                    day=self.game_state["day_count"],
+                    error=f"{type(error).__name__}: {error}",
+                )
+                raise
+            finally:
+                # Also when a phase raises, so the game's conversations,
+                # checkpoint threads and event log writer don't outlive it
+                self.rag.clear_conversation_history()
+                release_game(self.game_id)
+                self.events.close()
+
+    def _play_game(self):
         print("\nStarting Werewolf Game...")
-        print(f"{VILLAGER_NUM} Villagers vs {WEREWOLF_NUM} Werewolves")  # Fixed comment
+        alive_players = self.game_state["alive_players"]
+        print(
+            f"{alive_players.count('villager')} Villagers vs "
+            f"{alive_players.count('werewolf')} Werewolves"
+        )
         print(f"Maximum discussion cycles per day: {MAX_DISCUSSION_CYCLE}")
 
         while True:
@@ -383,17 +640,22 @@ class Controller:
             )
             print(f"{player_id}: {player.role_name} - {status}")
 
-        self.rag.clear_conversation_history()
+        result = {
+            "game_id": self.game_id,
+            "winner": winner,
+            "days": self.game_state["day_count"] + 1,  # day_count starts at 0
+            "llm_calls": self.llm_counter.calls,
+            "decisions": self.llm_counter.decisions,
+            "decision_calls": self.llm_counter.decision_calls,
+            "llm_calls_saved_estimate": calls_saved(
+                self.llm_counter.decisions, self.llm_counter.decision_calls
+            ),
+            "survivors": list(self.game_state["alive_players"]),
+        }
+        self.events.emit("game_end", **result)
+
+        return result
 
     def get_werewolf_teammate(self, player_id: str):
         """Get list of werewolf teammates for a given player"""
-        if self.players[player_id].role_name != "werewolf":
-            return []
-
-        werewolf_teammates = [
-            p_id
-            for p_id in self.game_state["alive_players"]
-            if self.players[p_id].role_name == "werewolf" and p_id != player_id
-        ]
-
-        return werewolf_teammates
+        return self.roles.teammates(player_id)
@@ -0,0 +1,103 @@
+import threading
+import time
+from typing import Callable, List, Optional
+
+from langchain_core.documents import Document
+
+
+class ConversationIngestor:
+    """Queues conversation documents and embeds them in background batches.
+
+    Statements are queued as they are spoken. A worker thread hands them to
+    add_documents once batch_size documents are waiting or flush_interval
+    seconds have passed. flush() blocks until everything queued so far is
+    stored, and re-raises a failure from the worker. close() flushes and
+    stops the worker thread.
+    """
+
+    def __init__(
+        self,
+        add_documents: Callable[[List[Document]], object],
+        batch_size: int = 16,
+        flush_interval: float = 0.5,
+    ):
+        self.add_documents = add_documents
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.batches = 0
+        self._queue: List[Document] = []
+        self._in_flight = 0
+        self._flushing = 0
+        self._error: Optional[BaseException] = None
+        self._closed = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(
+            target=self._run, name="conversation-ingest", daemon=True
+        )
+        self._thread.start()
+
+    def put(self, documents: List[Document]):
+        with self._condition:
+            self._queue.extend(documents)
+            self._condition.notify_all()
+
+    def flush(self, timeout: Optional[float] = None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            self._flushing += 1
+            self._condition.notify_all()
+            try:
+                while self._queue or self._in_flight:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise TimeoutError("Conversation ingestion did not finish in time")
+                    self._condition.wait(remaining)
+            finally:
+                self._flushing -= 1
+
+            error, self._error = self._error, None
+        if error is not None:
+            raise error
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            with self._condition:
+                self._closed = True
+                self._condition.notify_all()
+            self._thread.join()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                oldest = time.monotonic()
+                while not self._closed:
+                    waited = time.monotonic() - oldest
+                    if len(self._queue) >= self.batch_size or (
+                        self._queue and (self._flushing or waited >= self.flush_interval)
+                    ):
+                        break
+                    if not self._queue:
+                        self._condition.wait()
+                        oldest = time.monotonic()
+                    else:
+                        self._condition.wait(self.flush_interval - waited)
+
+                if self._closed and not self._queue:
+                    return
+
+                batch = self._queue[: self.batch_size]
+                del self._queue[: self.batch_size]
+                self._in_flight = len(batch)
+
+            try:
+                self.add_documents(batch)
+            except Exception as error:
+                with self._condition:
+                    self._error = error
+            finally:
+                with self._condition:
+                    self._in_flight = 0
+                    self.batches += 1
+                    self._condition.notify_all()
@@ -0,0 +1,110 @@
+from typing import List, Optional, Tuple
+
+from langchain_core.messages import SystemMessage
+
+from callbacks import DECISION_TAG
+from config import AGENT_CALLS_PER_DECISION, DECISION_MODE
+from models import get_shared_chat_model
+from utils import role_system_prompt
+
+# Ballot option for voters who may abstain
+ABSTAIN = "none"
+
+# Process-wide decision mode; benchmark and tournament workers override it
+_mode = {"decision": DECISION_MODE}
+
+
+def set_decision_mode(mode: Optional[str]):
+    """Select how votes and decisions are made: "agent" or "structured" """
+    if mode:
+        if mode not in ("agent", "structured"):
+            raise ValueError(f"Unknown decision mode: {mode}")
+        _mode["decision"] = mode
+
+
+def decision_mode() -> str:
+    return _mode["decision"]
+
+
+def structured_decision(player, messages: list, choices: List[str], query: str) -> str:
+    """One schema-constrained model call whose answer is one of choices"""
+    model, prompt, config = _decision_call(player, messages, choices, query)
+    return _choice(model.invoke(prompt, config=config), choices)
+
+
+async def astructured_decision(
+    player, messages: list, choices: List[str], query: str
+) -> str:
+    """Async counterpart of structured_decision"""
+    model, prompt, config = _decision_call(player, messages, choices, query)
+    return _choice(await model.ainvoke(prompt, config=config), choices)
+
+
+def calls_per_decision(decisions: int, decision_calls: int) -> float:
+    """Measured model calls per vote or decision"""
+    return decision_calls / decisions if decisions else 0.0
+
+
+def calls_saved(
+    decisions: int,
+    decision_calls: int,
+    agent_calls_per_decision: float = AGENT_CALLS_PER_DECISION,
+) -> float:
+    """Model calls saved by structured decisions, against an agent-mode average.
+
+    Pass calls_per_decision measured in an agent-mode run (e.g. a benchmark
+    baseline) for a measured figure; the AGENT_CALLS_PER_DECISION default
+    only gives an estimate.
+    """
+    if decision_mode() != "structured":
+        return 0.0
+    return max(0.0, decisions * agent_calls_per_decision - decision_calls)
+
+
+def _decision_call(player, messages: list, choices: List[str], query: str) -> Tuple:
+    schema = {
+        "title": "Decision",
+        "description": "Your final answer",
+        "type": "object",
+        "properties": {
+            "choice": {
+                "type": "string",
+                "enum": list(choices),
+                "description": "Exactly one of the allowed options",
+            }
+        },
+        "required": ["choice"],
+    }
+    model = get_shared_chat_model().with_structured_output(schema)
+
+    prompt = [SystemMessage(content=role_system_prompt(player.role_name, player.get_user_id()))]
+    context = _retrieval_context(player, query)
+    if context:
+        prompt.append(SystemMessage(content=context))
+    prompt.extend(messages)
+
+    config = {"callbacks": player.call_callbacks(), "tags": [DECISION_TAG]}
+    return model, prompt, config
+
+
+def _retrieval_context(player, query: str) -> str:
+    """What the agent would otherwise look up with its tools, fetched up front"""
+    sections = []
+    strategies = player.rag.similarity_search(player.role_name, query, k=2)
+    if strategies:
+        sections.append(
+            "Relevant strategies:\n" + "\n\n".join(doc.page_content for doc in strategies)
+        )
+    if player.game_id:
+        statements = player.rag.search_conversations(query, k=3, game_id=player.game_id)
+        if statements:
+            sections.append(
+                "Relevant statements from this game:\n"
+                + "\n".join(doc.page_content for doc in statements)
+            )
+    return "\n\n".join(sections)
+
+
+def _choice(result, choices: List[str]) -> str:
+    choice = result.get("choice") if isinstance(result, dict) else None
+    return choice if choice in choices else ""
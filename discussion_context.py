@@ -0,0 +1,121 @@
+import re
+from typing import Callable, List, Optional
+
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from config import DISCUSSION_SUMMARIZER, DISCUSSION_TOKEN_BUDGET
+from models import get_shared_chat_model
+from transcript import Transcript
+
+# Summarizers take (previous summary, cycle number, cycle text) and return the new summary
+Summarizer = Callable[[str, int, str], str]
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // 4 + 1
+
+
+def extractive_summarizer(previous: str, cycle: int, cycle_text: str) -> str:
+    """Keep the first sentence of every statement in the cycle"""
+    lines = []
+    for line in cycle_text.splitlines():
+        player, _, message = line.partition(": ")
+        first_sentence = re.split(r"(?<=[.!?])\s", message.strip(), maxsplit=1)[0]
+        lines.append(f"{player}: {first_sentence}")
+
+    summary = f"Cycle {cycle}: " + " | ".join(lines)
+    return f"{previous}\n{summary}" if previous else summary
+
+
+def llm_summarizer(callbacks: Optional[list] = None) -> Summarizer:
+    """Summarizer that folds each cycle into the running summary with one model call"""
+
+    def summarize(previous: str, cycle: int, cycle_text: str) -> str:
+        messages = [
+            SystemMessage(
+                content="You keep a running summary of a Werewolf game's day discussion. "
+                "Update the summary with the new cycle. Keep who accused, defended or "
+                "suspected whom. Be brief."
+            ),
+            HumanMessage(
+                content=f"Summary so far:\n{previous or '(none)'}\n\n"
+                f"Cycle {cycle}:\n{cycle_text}"
+            ),
+        ]
+        response = get_shared_chat_model().invoke(
+            messages, config={"callbacks": callbacks or []}
+        )
+        return response.content
+
+    return summarize
+
+
+class DiscussionContext:
+    """A day's discussion kept within a prompt token budget.
+
+    Recent cycles are quoted verbatim. Once the day exceeds budget_tokens,
+    the oldest closed cycles are folded into a rolling summary. Each cycle
+    is summarized at most once, and the rendered context is shared by every
+    voter.
+    """
+
+    def __init__(
+        self,
+        transcript: Transcript,
+        budget_tokens: int = DISCUSSION_TOKEN_BUDGET,
+        summarizer: Optional[Summarizer] = None,
+    ):
+        self.transcript = transcript
+        self.budget_tokens = budget_tokens
+        self.summarizer = summarizer or extractive_summarizer
+        self.summary = ""
+        self.summarized_cycles: List[int] = []
+        self._rendered: Optional[str] = None
+        self._rendered_at = -1
+
+    def compact(self):
+        """Fold the oldest closed cycles into the summary while over budget"""
+        verbatim = self._verbatim_cycles()
+        # The latest cycle may still be in progress, so it is never folded
+        while len(verbatim) > 1 and self._estimate(verbatim) > self.budget_tokens:
+            cycle = verbatim.pop(0)
+            self.summary = self.summarizer(
+                self.summary, cycle, self.transcript.cycle(cycle)
+            )
+            self.summarized_cycles.append(cycle)
+            self._rendered = None
+
+    def render(self) -> str:
+        """Summary of folded cycles followed by the remaining cycles verbatim"""
+        if self._rendered is not None and self._rendered_at == len(self.transcript):
+            return self._rendered
+
+        self.compact()
+        verbatim = self._verbatim_cycles()
+        if not self.summarized_cycles:
+            text = self.transcript.full()
+        else:
+            parts = [
+                f"Summary of earlier cycles ({self.summarized_cycles[0]}-"
+                f"{self.summarized_cycles[-1]}):\n{self.summary}"
+            ]
+            parts.extend(self.transcript.cycle(cycle) for cycle in verbatim)
+            text = "\n\n".join(parts)
+
+        self._rendered = text
+        self._rendered_at = len(self.transcript)
+        return text
+
+    def _verbatim_cycles(self) -> List[int]:
+        return [c for c in self.transcript.cycles() if c not in self.summarized_cycles]
+
+    def _estimate(self, verbatim: List[int]) -> int:
+        return estimate_tokens(self.summary) + sum(
+            estimate_tokens(self.transcript.cycle(cycle)) for cycle in verbatim
+        )
+
+
+def create_summarizer(callbacks: Optional[list] = None) -> Summarizer:
+    if DISCUSSION_SUMMARIZER == "llm":
+        return llm_summarizer(callbacks)
+    return extractive_summarizer
@@ -0,0 +1,152 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from array import array
+from typing import Dict, List
+
+from langchain_core.embeddings import Embeddings
+
+# SQLite caps the number of bound parameters per statement
+_BATCH_SIZE = 500
+
+# Cache hits refresh last_used in memory; they are written out once this many
+# keys or seconds have accumulated, and always before eviction
+_TOUCH_FLUSH_SIZE = 500
+_TOUCH_FLUSH_INTERVAL = 30.0
+
+
+class CachedEmbeddings(Embeddings):
+    """Embedding wrapper backed by a persistent, content-addressed SQLite cache.
+
+    Vectors are keyed by sha256(model + text), so unchanged rules, strategy
+    texts and repeated tool queries are embedded once across runs and
+    processes. The least recently used entries are evicted beyond
+    max_entries.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        model_name: str,
+        path: str,
+        max_entries: int = 50000,
+    ):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._touched: Dict[str, float] = {}
+        self._touched_since = time.monotonic()
+        self._connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        # Durable enough for a cache under WAL, without an fsync per commit
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)"
+        )
+        self._connection.commit()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [self._key(text) for text in texts]
+
+        with self._lock:
+            cached = self._lookup(keys)
+            hits = sum(1 for key in keys if key in cached)
+            self.hits += hits
+            self.misses += len(keys) - hits
+
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in cached:
+                missing.setdefault(key, text)
+
+        if missing:
+            vectors = self.embeddings.embed_documents(list(missing.values()))
+            computed = dict(zip(missing.keys(), vectors))
+            with self._lock:
+                self._store(computed)
+            cached.update(computed)
+
+        return [cached[key] for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            (entries,) = self._connection.execute(
+                "SELECT COUNT(*) FROM embeddings"
+            ).fetchone()
+            hits, misses = self.hits, self.misses
+        lookups = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "entries": entries,
+        }
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode("utf-8")).hexdigest()
+
+    def _lookup(self, keys: List[str]) -> Dict[str, List[float]]:
+        found = {}
+        unique_keys = list(dict.fromkeys(keys))
+        for start in range(0, len(unique_keys), _BATCH_SIZE):
+            batch = unique_keys[start : start + _BATCH_SIZE]
+            placeholders = ",".join("?" * len(batch))
+            rows = self._connection.execute(
+                f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                batch,
+            ).fetchall()
+            for key, blob in rows:
+                vector = array("f")
+                vector.frombytes(blob)
+                found[key] = vector.tolist()
+
+        now = time.time()
+        self._touched.update((key, now) for key in found)
+        if (
+            len(self._touched) >= _TOUCH_FLUSH_SIZE
+            or time.monotonic() - self._touched_since >= _TOUCH_FLUSH_INTERVAL
+        ):
+            self._flush_touched()
+            self._connection.commit()
+        return found
+
+    def _flush_touched(self):
+        """Write the last_used times of cache hits held in memory"""
+        if self._touched:
+            self._connection.executemany(
+                "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                [(used, key) for key, used in self._touched.items()],
+            )
+            self._touched.clear()
+        self._touched_since = time.monotonic()
+
+    def _store(self, vectors: Dict[str, List[float]]):
+        now = time.time()
+        self._connection.executemany(
+            "INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+            [(key, array("f", vector).tobytes(), now) for key, vector in vectors.items()],
+        )
+        self._evict()
+        self._connection.commit()
+
+    def _evict(self):
+        self._flush_touched()
+        (entries,) = self._connection.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        excess = entries - self.max_entries
+        if excess > 0:
+            self._connection.execute(
+                "DELETE FROM embeddings WHERE key IN "
+                "(SELECT key FROM embeddings ORDER BY last_used LIMIT ?)",
+                (excess,),
+            )
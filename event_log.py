@@ -0,0 +1,137 @@
+"""Append-only JSONL log of one game's events.
+
+Usage:
+    python event_log.py game_logs/<game_id>.jsonl    # print a game's timeline
+"""
+
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+from typing import Dict, Iterator, Optional
+
+from config import EVENT_LOG_DIR, EVENT_LOG_FLUSH_INTERVAL
+
+_CLOSE = object()
+
+
+class EventLog:
+    """Buffered JSONL writer for setup, statements, ballots and other game events.
+
+    emit() only timestamps the record and queues it; a background thread
+    writes queued records in batches every flush_interval seconds, so the
+    game loop never waits on the disk. Each record carries the game id, the
+    event name, seconds since the log was opened (monotonic) and wall time.
+    """
+
+    def __init__(
+        self, path: str, game_id: str, flush_interval: float = EVENT_LOG_FLUSH_INTERVAL
+    ):
+        self.path = path
+        self.game_id = game_id
+        self.flush_interval = flush_interval
+        self.events = 0
+        self._started = time.monotonic()
+        self._queue: "queue.Queue" = queue.Queue()
+        self._file = open(path, "a", encoding="utf-8")
+        self._thread = threading.Thread(target=self._run, name="event-log", daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def for_game(cls, game_id: str, directory: Optional[str] = EVENT_LOG_DIR):
+        """The log for a game in directory, or a NullEventLog when logging is off"""
+        if not directory:
+            return NullEventLog()
+        os.makedirs(directory, exist_ok=True)
+        return cls(os.path.join(directory, f"{game_id}.jsonl"), game_id)
+
+    def emit(self, event: str, **fields):
+        self.events += 1
+        self._queue.put({
+            "event": event,
+            "game_id": self.game_id,
+            "t": round(time.monotonic() - self._started, 6),
+            "wall_time": time.time(),
+            **fields,
+        })
+
+    def close(self):
+        """Write everything queued so far and close the file"""
+        self._queue.put(_CLOSE)
+        self._thread.join()
+
+    def _run(self):
+        closed = False
+        while not closed:
+            record = self._queue.get()
+            records = []
+            deadline = time.monotonic() + self.flush_interval
+            while record is not _CLOSE:
+                records.append(record)
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    record = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+
+            closed = record is _CLOSE
+            if records:
+                self._file.write(
+                    "".join(json.dumps(record, default=str) + "\n" for record in records)
+                )
+                self._file.flush()
+
+        self._file.close()
+
+
+class NullEventLog:
+    """Stand-in when event logging is disabled"""
+
+    events = 0
+
+    def emit(self, event: str, **fields):
+        pass
+
+    def close(self):
+        pass
+
+
+def read_events(path: str) -> Iterator[Dict]:
+    with open(path, encoding="utf-8") as file:
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
+
+
+def format_event(record: Dict) -> str:
+    details = {
+        key: value
+        for key, value in record.items()
+        if key not in ("event", "game_id", "t", "wall_time", "llm")
+    }
+    llm = record.get("llm")
+    usage = ""
+    if llm:
+        usage = (
+            f"  [{llm['llm_calls']} calls, {llm['llm_latency']:.2f}s, "
+            f"{llm['input_tokens']}+{llm['output_tokens']} tokens]"
+        )
+    text = " ".join(f"{key}={value}" for key, value in details.items())
+    return f"{record['t']:9.3f}s {record['event']:<12} {text}{usage}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Print a game's event timeline")
+    parser.add_argument("path", help="JSONL event log of one game")
+    args = parser.parse_args()
+
+    for record in read_events(args.path):
+        print(format_event(record))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,62 @@
+import hashlib
+import json
 import os
 import bs4
-from langchain_openai import OpenAIEmbeddings
 from langchain_chroma import Chroma
 from langchain_community.document_loaders import WebBaseLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.tools import tool
 from Player import GameState
-from typing import Optional, Any, Dict
+from typing import Optional, Any, Dict, List
 from langchain_openai import ChatOpenAI
 from langchain_core.documents import Document
-from config import VILLAGER_NUM, WEREWOLF_NUM, PLAYER_NUM
+from langchain_core.embeddings import Embeddings
+from config import (
+    WEREWOLF_NUM,
+    PLAYER_NUM,
+    EMBEDDING_CACHE_PATH,
+    EMBEDDING_CACHE_MAX_ENTRIES,
+    CONVERSATION_FLUSH_BATCH_SIZE,
+    CONVERSATION_FLUSH_INTERVAL,
+    RETRIEVAL_CACHE_SIZE,
+    RETRIEVAL_CACHE_SIMILARITY,
+    VECTOR_STORE_BACKENDS,
+    CONVERSATION_RECENCY_DECAY,
+    CONVERSATION_CANDIDATE_MULTIPLIER,
+)
+from numpy_index import NumpyVectorIndex
+from retrieval_cache import RetrievalCache
+from tracing import span
+from conversation_ingest import ConversationIngestor
+from embedding_cache import CachedEmbeddings
+from models import create_embeddings, embedding_backend, requires_openai
+
+# Static stores: collection name and Chroma directory, used when their backend is "chroma"
+PERSISTENT_STORES = {
+    "rule": ("shared_rules", "./chroma_db/rules"),
+    "werewolf": ("werewolf_strategies", "./chroma_db/werewolf"),
+    "villager": ("villager_strategies", "./chroma_db/villager"),
+}
+
+
+class _CountingEmbeddings(Embeddings):
+    """Embedding wrapper that records how many texts reach the backend"""
+
+    def __init__(self, embeddings: Embeddings, stats: Dict[str, int]):
+        self.embeddings = embeddings
+        self.stats = stats
+
+    def embed_documents(self, texts):
+        self.stats["embedding_calls"] += 1
+        self.stats["embedded_texts"] += len(texts)
+        with span("embed_documents", "embedding", texts=len(texts)):
+            return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text):
+        self.stats["embedding_calls"] += 1
+        self.stats["embedded_texts"] += 1
+        with span("embed_query", "embedding"):
+            return self.embeddings.embed_query(text)
 
 
 class GameRAG:
@@ -18,58 +65,241 @@ class GameRAG:
         chunk_size: int = 1000,
         chunk_overlap: int = 200,
         embedding_model: str = "text-embedding-3-large",
+        conversation_namespace: str = "current_conversation",
     ):
-        if not os.environ.get("OPENAI_API_KEY"):
+        if requires_openai() and not os.environ.get("OPENAI_API_KEY"):
             print("OpenAI API Key not found")
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
-        self.embeddings = OpenAIEmbeddings(model=embedding_model)
+        self.conversation_namespace = conversation_namespace
+        self.latest_day: Dict[str, int] = {}
+        self.stats = {"embedding_calls": 0, "embedded_texts": 0, "similarity_searches": 0}
+        self.embeddings = _CountingEmbeddings(
+            create_embeddings(embedding_model), self.stats
+        )
+        if EMBEDDING_CACHE_PATH:
+            self.embeddings = CachedEmbeddings(
+                self.embeddings,
+                model_name=f"{embedding_backend()}/{embedding_model}",
+                path=EMBEDDING_CACHE_PATH,
+                max_entries=EMBEDDING_CACHE_MAX_ENTRIES,
+            )
+        self.retrieval_cache = (
+            RetrievalCache(RETRIEVAL_CACHE_SIZE, RETRIEVAL_CACHE_SIMILARITY)
+            if RETRIEVAL_CACHE_SIZE
+            else None
+        )
         self.rule_vector_store = None
         self.werewolf_vector_store = None
         self.villager_vector_store = None
+        # Created by the first statement or search of each game, dropped when it ends
         self.conversation_vector_store = None
         self.initialize_all_vectors()
         self.text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=self.chunk_size, chunk_overlap=self.chunk_overlap
         )
-        self.rule = self.load_rules()
+        # Started by the first queued statement, stopped when a game's history is cleared
+        self.conversation_ingestor: Optional[ConversationIngestor] = None
+        self.roster = (PLAYER_NUM, WEREWOLF_NUM)
+        self.rule = self.load_rules(*self.roster)
         self.rule_splits = self.text_splitter.split_documents(documents=self.rule)
-        _ = self.rule_vector_store.add_documents(documents=self.rule_splits)
+        if self._add_unique(self.rule_vector_store, self.rule_splits):
+            self._invalidate_retrieval("rule")
 
     def initialize_all_vectors(self):
-        os.makedirs("./chroma_db/rules", exist_ok=True)
-        os.makedirs("./chroma_db/werewolf", exist_ok=True)
-        os.makedirs("./chroma_db/villager", exist_ok=True)
+        for store, (collection_name, directory) in PERSISTENT_STORES.items():
+            if VECTOR_STORE_BACKENDS.get(store, "chroma") == "chroma":
+                os.makedirs(directory, exist_ok=True)
+            setattr(
+                self,
+                f"{store}_vector_store",
+                self._create_store(store, collection_name, directory),
+            )
 
-        self.rule_vector_store = Chroma(
-            collection_name="shared_rules",
-            embedding_function=self.embeddings,
-            persist_directory="./chroma_db/rules",
-        )
+    def _conversation_store(self):
+        """The current namespace's conversation store, created on first use"""
+        if self.conversation_vector_store is None:
+            self.conversation_vector_store = self._create_store(
+                "conversation", self.conversation_namespace
+            )
+        return self.conversation_vector_store
 
-        self.werewolf_vector_store = Chroma(
-            collection_name="werewolf_strategies",
+    def _create_store(
+        self, store: str, collection_name: str, persist_directory: Optional[str] = None
+    ):
+        """Vector store for a named store, using the backend from VECTOR_STORE_BACKENDS"""
+        if VECTOR_STORE_BACKENDS.get(store, "chroma") == "numpy":
+            return NumpyVectorIndex(self.embeddings)
+        # Conversation relevance is weighted by recency, which needs scores in [0, 1];
+        # Chroma's default l2 space gives negative ones for dissimilar statements
+        metadata = {"hnsw:space": "cosine"} if store == "conversation" else None
+        return Chroma(
+            collection_name=collection_name,
             embedding_function=self.embeddings,
-            persist_directory="./chroma_db/werewolf",
+            persist_directory=persist_directory,
+            collection_metadata=metadata,
         )
 
-        self.villager_vector_store = Chroma(
-            collection_name="villager_strategies",
-            embedding_function=self.embeddings,
-            persist_directory="./chroma_db/villager",
-        )
+    def similarity_search(self, store: str, query: str, k: int = 2):
+        """Search a named vector store: rule, werewolf, villager or conversation.
 
-        self.conversation_vector_store = Chroma(
-            collection_name="current_conversation",
-            embedding_function=self.embeddings,
+        Results from the static stores are memoized by normalized query; the
+        conversation store changes every statement and is always searched.
+        """
+        with span(f"retrieval:{store}", "retrieval", k=k):
+            return self._similarity_search(store, query, k)
+
+    def _similarity_search(self, store: str, query: str, k: int):
+        if store == "conversation":
+            vector_store = self._conversation_store()
+        else:
+            vector_store = getattr(self, f"{store}_vector_store")
+        cache = self.retrieval_cache
+        if cache is None or store == "conversation":
+            self.stats["similarity_searches"] += 1
+            return vector_store.similarity_search(query, k=k)
+
+        docs = cache.get(store, query, k)
+        if docs is not None:
+            return docs
+
+        vector = None
+        if cache.similarity_threshold is not None:
+            vector = self.embeddings.embed_query(query)
+            docs = cache.get_similar(store, k, vector)
+            if docs is not None:
+                return docs
+
+        cache.record_miss()
+        self.stats["similarity_searches"] += 1
+        if vector is not None:
+            docs = vector_store.similarity_search_by_vector(vector, k=k)
+        else:
+            docs = vector_store.similarity_search(query, k=k)
+
+        cache.put(store, query, k, docs, vector)
+        return docs
+
+    def search_conversations(
+        self,
+        query: str,
+        k: int = 3,
+        game_id: Optional[str] = None,
+        day_from: Optional[int] = None,
+        day_to: Optional[int] = None,
+        phase: Optional[str] = None,
+        speaker: Optional[str] = None,
+        recency_decay: float = CONVERSATION_RECENCY_DECAY,
+    ) -> List[Document]:
+        """Search conversation statements matching the given filters.
+
+        The filters go to the store as a metadata where clause, so only
+        matching statements are ranked. Each candidate's relevance is then
+        multiplied by recency_decay once per day it is older than the
+        game's latest day; a decay of 1.0 ranks by relevance alone.
+        """
+        # Queued statements first, so results don't depend on the ingestor's timing
+        self.flush_conversations()
+        with span("retrieval:conversation", "retrieval", k=k, game_id=game_id):
+            return self._search_conversations(
+                query, k, game_id, day_from, day_to, phase, speaker, recency_decay
+            )
+
+    def _search_conversations(
+        self,
+        query: str,
+        k: int,
+        game_id: Optional[str],
+        day_from: Optional[int],
+        day_to: Optional[int],
+        phase: Optional[str],
+        speaker: Optional[str],
+        recency_decay: float,
+    ) -> List[Document]:
+        conditions = []
+        if game_id:
+            conditions.append({"game_id": game_id})
+        if day_from is not None:
+            conditions.append({"day_count": {"$gte": day_from}})
+        if day_to is not None:
+            conditions.append({"day_count": {"$lte": day_to}})
+        if phase:
+            conditions.append({"phase": phase})
+        if speaker:
+            conditions.append({"player": speaker})
+        where = None
+        if len(conditions) == 1:
+            where = conditions[0]
+        elif conditions:
+            where = {"$and": conditions}
+
+        fetch_k = k if recency_decay >= 1.0 else k * CONVERSATION_CANDIDATE_MULTIPLIER
+        self.stats["similarity_searches"] += 1
+        candidates = self._conversation_store().similarity_search_with_relevance_scores(
+            query, k=fetch_k, filter=where
         )
+        if recency_decay >= 1.0 or not candidates:
+            return [doc for doc, _ in candidates[:k]]
+
+        latest = self.latest_day.get(game_id) if game_id else None
+        if latest is None:
+            latest = max(doc.metadata.get("day_count", 0) for doc, _ in candidates)
+
+        def weighted(candidate):
+            doc, relevance = candidate
+            age = max(0, latest - doc.metadata.get("day_count", latest))
+            # A negative score would move toward 0 with age and favour old statements
+            return min(max(relevance, 0.0), 1.0) * recency_decay**age
+
+        return [doc for doc, _ in sorted(candidates, key=weighted, reverse=True)[:k]]
+
+    def batch_similarity_search(self, store: str, queries: List[str], k: int = 2):
+        """similarity_search for several queries; uncached ones are searched in one batch"""
+        with span(f"retrieval:{store}", "retrieval", k=k, queries=len(queries)):
+            return self._batch_similarity_search(store, queries, k)
+
+    def _batch_similarity_search(self, store: str, queries: List[str], k: int):
+        vector_store = getattr(self, f"{store}_vector_store")
+        if not isinstance(vector_store, NumpyVectorIndex):
+            return [self.similarity_search(store, query, k) for query in queries]
+
+        cache = self.retrieval_cache if store != "conversation" else None
+        results = [cache.get(store, query, k) if cache else None for query in queries]
+        missing = [i for i, docs in enumerate(results) if docs is None]
+        if not missing:
+            return results
 
-    def load_rules(self):
+        self.stats["similarity_searches"] += len(missing)
+        found = vector_store.similarity_search_batch([queries[i] for i in missing], k=k)
+        for i, docs in zip(missing, found):
+            results[i] = docs
+            if cache:
+                cache.record_miss()
+                cache.put(store, queries[i], k, docs)
+        return results
+
+    def _invalidate_retrieval(self, store: str):
+        if self.retrieval_cache is not None:
+            self.retrieval_cache.invalidate(store)
+
+    def use_roster(self, player_num: int, werewolf_num: int):
+        """Describe this roster's player counts in the rules, replacing the previous ones"""
+        if (player_num, werewolf_num) == self.roster:
+            return
+        previous = [document_id(doc.page_content) for doc in self.rule_splits]
+        self.roster = (player_num, werewolf_num)
+        self.rule = self.load_rules(player_num, werewolf_num)
+        self.rule_splits = self.text_splitter.split_documents(documents=self.rule)
+        self.rule_vector_store.delete(ids=previous)
+        self._add_unique(self.rule_vector_store, self.rule_splits)
+        self._invalidate_retrieval("rule")
+
+    def load_rules(self, player_num: int = PLAYER_NUM, werewolf_num: int = WEREWOLF_NUM):
         rules_text = f"""
         WEREWOLF GAME RULES
 
         SETUP:
-        - {PLAYER_NUM} players total: {VILLAGER_NUM} villagers and {WEREWOLF_NUM} werewolves
+        - {player_num} players total: {player_num - werewolf_num} villagers and {werewolf_num} werewolves
         - Roles are assigned secretly at the start of the game
         - Players sit in a circle for discussion phases
 
@@ -120,14 +350,47 @@ class GameRAG:
 
         return [Document(page_content=rules_text, metadata={"source": "game_rules"})]
 
-    def add_conversations(self, conversation: Dict[str, str], game_state: GameState):
-        """Add conversation and game state to data"""
-        flatten_game_state = self._flatten_metadata(game_state)
-        conversation_docs = self.text_splitter.create_documents(
-            texts=[str(conversation)], metadatas=[flatten_game_state]
+    def add_statement(
+        self,
+        player: str,
+        message: str,
+        game_state: GameState,
+        cycle: int,
+        game_id: str = "",
+    ):
+        """Queue one discussion statement for background embedding"""
+        metadata = self._flatten_metadata(game_state)
+        metadata.update({"player": player, "cycle": cycle, "game_id": game_id})
+        self.latest_day[game_id] = max(
+            self.latest_day.get(game_id, 0), game_state["day_count"]
         )
+        statement_docs = self.text_splitter.create_documents(
+            texts=[f"{player}: {message}"], metadatas=[metadata]
+        )
+
+        if self.conversation_ingestor is None:
+            # Create the store here, not on the ingestor thread, which races with searches
+            self._conversation_store()
+            self.conversation_ingestor = ConversationIngestor(
+                self._store_conversations,
+                batch_size=CONVERSATION_FLUSH_BATCH_SIZE,
+                flush_interval=CONVERSATION_FLUSH_INTERVAL,
+            )
+        self.conversation_ingestor.put(statement_docs)
 
-        self.conversation_vector_store.add_documents(conversation_docs)
+    def flush_conversations(self):
+        """Block until every queued statement is searchable"""
+        if self.conversation_ingestor is not None:
+            self.conversation_ingestor.flush()
+
+    def close(self):
+        """Store queued statements and stop the ingestor thread"""
+        ingestor, self.conversation_ingestor = self.conversation_ingestor, None
+        if ingestor is not None:
+            ingestor.close()
+
+    def _store_conversations(self, documents: List[Document]):
+        self._add_unique(self._conversation_store(), documents, include_metadata=True)
 
     def add_werewolf_knowledge(self, knowledge: str, game_state: GameState):
         """Add werewolf knowledge to werewolf vector"""
@@ -136,7 +399,8 @@ class GameRAG:
             texts=[knowledge], metadatas=[flatten_game_state]
         )
 
-        self.werewolf_vector_store.add_documents(knowledge_docs)
+        if self._add_unique(self.werewolf_vector_store, knowledge_docs):
+            self._invalidate_retrieval("werewolf")
 
     def add_villager_knowledge(self, knowledge: str, game_state: GameState):
         """Add villager knowledge to villager vector"""
@@ -145,13 +409,38 @@ class GameRAG:
             texts=[knowledge], metadatas=[flatten_game_state]
         )
 
-        self.villager_vector_store.add_documents(knowledge_docs)
+        if self._add_unique(self.villager_vector_store, knowledge_docs):
+            self._invalidate_retrieval("villager")
 
     def clear_conversation_history(self):
-        """Clears the conversation vector store after each game"""
-        self.conversation_vector_store = Chroma(
-            collection_name="current_conversation", embedding_function=self.embeddings
-        )
+        """Drops the conversation vector store after each game"""
+        self.close()
+        if self.conversation_vector_store is not None:
+            self.conversation_vector_store.delete_collection()
+            self.conversation_vector_store = None
+        self.latest_day.clear()
+
+    def use_conversation_namespace(self, namespace: str):
+        """Switch conversations to a separate collection, e.g. one per game"""
+        self.close()
+        self.conversation_namespace = namespace
+        self.conversation_vector_store = None
+
+    def _add_unique(
+        self, vector_store, documents: List[Document], include_metadata: bool = False
+    ) -> List[str]:
+        """Add documents under content-hash ids, skipping any already stored"""
+        unique = {
+            document_id(doc.page_content, doc.metadata if include_metadata else None): doc
+            for doc in documents
+        }
+        existing = {doc.id for doc in vector_store.get_by_ids(list(unique))}
+        new_ids = [doc_id for doc_id in unique if doc_id not in existing]
+
+        if new_ids:
+            vector_store.add_documents([unique[doc_id] for doc_id in new_ids], ids=new_ids)
+
+        return new_ids
 
     def _flatten_metadata(self, game_state: GameState):
         return {
@@ -163,3 +452,63 @@ class GameRAG:
             "last_night_victim": game_state["last_night_victim"],
             "total_players": len(game_state["players"]),
         }
+
+
+def document_id(text: str, metadata: Optional[Dict[str, Any]] = None) -> str:
+    """Content-hash id, so re-ingesting the same chunk is a no-op"""
+    content = text if metadata is None else text + json.dumps(metadata, sort_keys=True)
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def compact_persistent_stores() -> Dict[str, int]:
+    """Compact the Chroma collections on disk, whichever backend the stores use at runtime"""
+    removed = {}
+    for store, (collection_name, directory) in PERSISTENT_STORES.items():
+        if not os.path.isdir(directory):
+            continue
+        # Compaction reuses stored embeddings, so no embedding function is needed
+        vector_store = Chroma(collection_name=collection_name, persist_directory=directory)
+        removed[store] = compact_vector_store(vector_store)
+    return removed
+
+
+def compact_vector_store(vector_store) -> int:
+    """Delete duplicate chunks from a Chroma store, keeping one per content hash.
+
+    Survivors stored under legacy random ids are moved to their content-hash
+    id with their existing embedding, so nothing is re-embedded. Returns the
+    number of duplicates removed.
+    """
+    if not isinstance(vector_store, Chroma):
+        # In-memory indexes are keyed by content hash and never hold duplicates
+        return 0
+
+    records = vector_store.get(include=["documents", "metadatas", "embeddings"])
+
+    groups: Dict[str, List[int]] = {}
+    for index, text in enumerate(records["documents"]):
+        groups.setdefault(document_id(text), []).append(index)
+
+    removed = 0
+    stale_ids = []
+    for content_id, indexes in groups.items():
+        ids = [records["ids"][index] for index in indexes]
+        removed += len(ids) - 1
+
+        if content_id in ids:
+            stale_ids.extend(doc_id for doc_id in ids if doc_id != content_id)
+            continue
+
+        keep = indexes[0]
+        vector_store._collection.add(
+            ids=[content_id],
+            embeddings=[records["embeddings"][keep]],
+            documents=[records["documents"][keep]],
+            metadatas=[records["metadatas"][keep]],
+        )
+        stale_ids.extend(ids)
+
+    if stale_ids:
+        vector_store.delete(ids=stale_ids)
+
+    return removed
@@ -0,0 +1,245 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import (
+    AIMessageChunk,
+    BaseMessage,
+    message_chunk_to_message,
+    message_to_dict,
+    messages_from_dict,
+)
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from pydantic import PrivateAttr
+
+
+class ReplayMissError(KeyError):
+    """A replayed run made a request that was never recorded"""
+
+
+class RecordReplayChatModel(BaseChatModel):
+    """Chat model wrapper that records responses to SQLite or replays them.
+
+    Requests are keyed by a hash of the replay scope, model name, bound
+    tools and options (as bound here, before the wrapped model rewrites them),
+    the messages (without run-specific ids) and how many times the same
+    request was already made in the scope. "record" calls the
+    wrapped model and stores each response; "replay" serves stored responses
+    and never calls a model, raising ReplayMissError on an unknown request.
+    Streamed and unstreamed calls share keys; recording forwards the wrapped
+    model's chunks, replay streams each stored message as one chunk.
+    """
+
+    recorded_model: str
+    mode: str = "record"
+    path: str = "./llm_cache.sqlite"
+    inner: Optional[Any] = None
+
+    _connection: Any = PrivateAttr(default=None)
+    _lock: Any = PrivateAttr(default_factory=threading.Lock)
+    _scope: str = PrivateAttr(default="")
+    _occurrences: Dict[str, int] = PrivateAttr(default_factory=dict)
+
+    def model_post_init(self, __context: Any):
+        super().model_post_init(__context)
+        if self.mode not in ("record", "replay"):
+            raise ValueError(f"Unknown LLM cache mode: {self.mode}")
+        if self.mode == "record" and self.inner is None:
+            raise ValueError("Recording needs a model to call")
+        self._connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, model TEXT NOT NULL, response TEXT NOT NULL, "
+            "created REAL NOT NULL)"
+        )
+        self._connection.commit()
+
+    @property
+    def _llm_type(self) -> str:
+        return f"{self.mode}:{self.inner._llm_type if self.inner else self.recorded_model}"
+
+    def set_scope(self, scope: str):
+        """Start a new request sequence, e.g. one per seeded game"""
+        with self._lock:
+            self._scope = scope
+            self._occurrences.clear()
+
+    def reseed(self, seed: Optional[int]):
+        if hasattr(self.inner, "reseed"):
+            self.inner.reseed(seed)
+
+    def bind_tools(self, tools: Sequence[Any], *, tool_choice: Any = None, **kwargs: Any):
+        # Bound the same way in both modes so recorded keys replay; the wrapped
+        # model formats them its own way only when it is called (_inner_options)
+        formatted_tools = [convert_to_openai_tool(tool) for tool in tools]
+        return self.bind(tools=formatted_tools, tool_choice=tool_choice, **kwargs)
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        key = self._key(messages, stop, kwargs)
+        if self.mode == "replay":
+            return self._load(key)
+
+        result = self.inner._generate(messages, stop=stop, **self._inner_options(kwargs))
+        self._save(key, result)
+        return result
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        key = self._key(messages, stop, kwargs)
+        if self.mode == "replay":
+            return self._load(key)
+
+        result = await self.inner._agenerate(
+            messages, stop=stop, **self._inner_options(kwargs)
+        )
+        self._save(key, result)
+        return result
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        key = self._key(messages, stop, kwargs)
+        if self.mode == "replay":
+            yield from _replayed_chunks(self._load(key))
+            return
+
+        chunks = []
+        for chunk in self.inner._stream(messages, stop=stop, **self._inner_options(kwargs)):
+            chunks.append(chunk)
+            yield chunk
+        self._save(key, _streamed_result(chunks))
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        key = self._key(messages, stop, kwargs)
+        if self.mode == "replay":
+            for chunk in _replayed_chunks(self._load(key)):
+                yield chunk
+            return
+
+        chunks = []
+        async for chunk in self.inner._astream(
+            messages, stop=stop, **self._inner_options(kwargs)
+        ):
+            chunks.append(chunk)
+            yield chunk
+        self._save(key, _streamed_result(chunks))
+
+    def _inner_options(self, kwargs: Dict) -> Dict:
+        """Bound options in the wrapped model's format, e.g. ChatOpenAI's tool_choice"""
+        if "tools" not in kwargs:
+            return kwargs
+        options = dict(kwargs)
+        tools = options.pop("tools")
+        tool_choice = options.pop("tool_choice", None)
+        return self.inner.bind_tools(tools, tool_choice=tool_choice, **options).kwargs
+
+    def _key(self, messages: List[BaseMessage], stop: Optional[List[str]], kwargs: Dict) -> str:
+        request = json.dumps(
+            {
+                "model": self.recorded_model,
+                "messages": [_canonical(message) for message in messages],
+                "stop": stop,
+                "options": {key: value for key, value in kwargs.items() if value is not None},
+            },
+            sort_keys=True,
+            default=str,
+        )
+        digest = hashlib.sha256(request.encode("utf-8")).hexdigest()
+
+        with self._lock:
+            occurrence = self._occurrences.get(digest, 0)
+            self._occurrences[digest] = occurrence + 1
+            scope = self._scope
+        return hashlib.sha256(f"{scope}\0{digest}\0{occurrence}".encode("utf-8")).hexdigest()
+
+    def _load(self, key: str) -> ChatResult:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT response FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            raise ReplayMissError(f"No recorded response for request {key[:12]}")
+        generations = [
+            ChatGeneration(message=message)
+            for message in messages_from_dict(json.loads(row[0]))
+        ]
+        return ChatResult(generations=generations)
+
+    def _save(self, key: str, result: ChatResult):
+        response = json.dumps(
+            [message_to_dict(generation.message) for generation in result.generations]
+        )
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO responses (key, model, response, created) "
+                "VALUES (?, ?, ?, ?)",
+                (key, self.recorded_model, response, time.time()),
+            )
+            self._connection.commit()
+
+
+def _streamed_result(chunks: List[ChatGenerationChunk]) -> ChatResult:
+    """The complete reply assembled from its streamed chunks"""
+    message = AIMessageChunk(content="")
+    for chunk in chunks:
+        message = message + chunk.message
+    return ChatResult(generations=[ChatGeneration(message=message_chunk_to_message(message))])
+
+
+def _replayed_chunks(result: ChatResult) -> Iterator[ChatGenerationChunk]:
+    for generation in result.generations:
+        message = generation.message
+        tool_call_chunks = [
+            {
+                "name": call["name"],
+                "args": json.dumps(call["args"]),
+                "id": call["id"],
+                "index": index,
+            }
+            for index, call in enumerate(getattr(message, "tool_calls", None) or [])
+        ]
+        yield ChatGenerationChunk(
+            message=AIMessageChunk(
+                content=message.content,
+                tool_call_chunks=tool_call_chunks,
+                usage_metadata=getattr(message, "usage_metadata", None),
+            )
+        )
+
+
+def _canonical(message: BaseMessage) -> Dict:
+    """The parts of a message that define a request; ids differ between runs"""
+    canonical = {"type": message.type, "content": message.content}
+    tool_calls = getattr(message, "tool_calls", None)
+    if tool_calls:
+        canonical["tool_calls"] = [
+            {"name": call["name"], "args": call["args"]} for call in tool_calls
+        ]
+    return canonical
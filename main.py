@@ -1,18 +1,14 @@
 import os
+from typing import List
+from alive_players import AlivePlayers
 from game_rag import GameRAG
 from Player import PlayerStatus, GameState  # Import GameState from Player
 from controller import Controller
-from config import PLAYER_NUM, VILLAGER_NUM, WEREWOLF_NUM
+from models import requires_openai
+from streaming import ConsoleTokenPrinter
+from config import AGENT_STREAM_MODE, PLAYER_NUM, PLAYER_NAMES
 
-
-def main():
-    if not os.environ.get("OPENAI_API_KEY"):
-        print("Please set your OPENAI_API_KEY")
-        return
-
-    rag = GameRAG()
-
-    werewolf_strategies = """
+WEREWOLF_STRATEGIES = """
     Werewolf strategies:
         1. During night discussion, coordinate with teammates on targets.
         2. During day discussion, blend in and deflect suspicion
@@ -21,7 +17,8 @@ def main():
         5. Build alliances with villagers 
         6. Vote strategically to avoid suspicion
     """
-    villager_strategies = """
+
+VILLAGER_STRATEGIES = """
     Villager strategies:
         1. Listen carefully to all statements for inconsistencies
         2. Track who votes for whom across multiple days
@@ -32,21 +29,48 @@ def main():
         7. Share your deductions openly but thoughtfully
     """
 
-    game_state = GameState({
+
+def new_game_state() -> GameState:
+    return GameState({
         "phase": "setup",
         "day_count": 0,
         "players": {},
-        "alive_players": [],
+        "alive_players": AlivePlayers(),
         "last_eliminated": "",
         "last_night_victim": "",
     })
 
-    rag.add_werewolf_knowledge(werewolf_strategies, game_state)
-    rag.add_villager_knowledge(villager_strategies, game_state)
 
-    game = Controller(rag, game_state)
-    players = ["Alice", "Bob", "Charlie", "Diana", "Eve", "Frank", "Carlos", "Potter"]
-    game.setup_game(players)
+def player_names(count: int = PLAYER_NUM) -> List[str]:
+    """The configured names, padded with numbered ones (Player001, ...) for large games"""
+    if count <= len(PLAYER_NAMES):
+        return PLAYER_NAMES[:count]
+    # Fixed width, so no generated name is contained in another
+    width = len(str(count))
+    extra = count - len(PLAYER_NAMES)
+    return PLAYER_NAMES + [f"Player{i:0{width}d}" for i in range(1, extra + 1)]
+
+
+def add_strategy_knowledge(rag: GameRAG, game_state: GameState):
+    rag.add_werewolf_knowledge(WEREWOLF_STRATEGIES, game_state)
+    rag.add_villager_knowledge(VILLAGER_STRATEGIES, game_state)
+
+
+def main():
+    if requires_openai() and not os.environ.get("OPENAI_API_KEY"):
+        print("Please set your OPENAI_API_KEY")
+        return
+
+    rag = GameRAG()
+
+    game_state = new_game_state()
+
+    add_strategy_knowledge(rag, game_state)
+
+    # Spectators see replies as they are generated when streaming tokens
+    on_token = ConsoleTokenPrinter() if AGENT_STREAM_MODE == "tokens" else None
+    game = Controller(rag, game_state, on_token=on_token)
+    game.setup_game(player_names())
     game.play_game()
 
 
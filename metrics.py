@@ -0,0 +1,146 @@
+import json
+import threading
+from typing import Dict, List, Optional, Tuple
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class MetricsRegistry:
+    """Process-wide counters and histograms with labels.
+
+    Snapshots are available as JSON (snapshot()) or in the Prometheus text
+    exposition format (prometheus()).
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._histograms: Dict[str, Dict[Labels, Dict]] = {}
+        self._help: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, labels: Dict[str, object], value: float = 1, help: str = ""):
+        key = _labels(labels)
+        with self._lock:
+            self._help.setdefault(name, help)
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, labels: Dict[str, object], value: float, help: str = ""):
+        key = _labels(labels)
+        with self._lock:
+            self._help.setdefault(name, help)
+            series = self._histograms.setdefault(name, {})
+            histogram = series.setdefault(
+                key, {"buckets": [0] * len(self.buckets), "count": 0, "sum": 0.0}
+            )
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    histogram["buckets"][index] += 1
+            histogram["count"] += 1
+            histogram["sum"] += value
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def snapshot(self) -> Dict:
+        """Every series as JSON-ready dicts: {"labels": ..., "value"} or histogram fields"""
+        with self._lock:
+            counters = {
+                name: [{"labels": dict(key), "value": value} for key, value in series.items()]
+                for name, series in self._counters.items()
+            }
+            histograms = {
+                name: [
+                    {
+                        "labels": dict(key),
+                        "count": histogram["count"],
+                        "sum": histogram["sum"],
+                        "buckets": dict(zip(map(str, self.buckets), histogram["buckets"])),
+                    }
+                    for key, histogram in series.items()
+                ]
+                for name, series in self._histograms.items()
+            }
+        return {"counters": counters, "histograms": histograms}
+
+    def prometheus(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                lines.extend(_header(name, self._help.get(name), "counter"))
+                for key, value in series.items():
+                    lines.append(f"{name}{_format_labels(key)} {value}")
+
+            for name, series in sorted(self._histograms.items()):
+                lines.extend(_header(name, self._help.get(name), "histogram"))
+                for key, histogram in series.items():
+                    for bound, count in zip(self.buckets, histogram["buckets"]):
+                        bucket_labels = key + (("le", str(bound)),)
+                        lines.append(f"{name}_bucket{_format_labels(bucket_labels)} {count}")
+                    inf_labels = key + (("le", "+Inf"),)
+                    lines.append(f"{name}_bucket{_format_labels(inf_labels)} {histogram['count']}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {histogram['sum']}")
+                    lines.append(f"{name}_count{_format_labels(key)} {histogram['count']}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+def record_action(role: str, phase: str, day: Optional[int], usage: Dict[str, float]):
+    """Record one player action's usage (a CallUsage summary) in the registry"""
+    labels = {"role": role, "phase": phase, "day": "" if day is None else day}
+    registry.inc("werewolf_actions_total", labels, help="Player actions")
+    registry.inc("werewolf_llm_calls_total", labels, usage["llm_calls"], help="Model calls")
+    registry.inc(
+        "werewolf_prompt_tokens_total", labels, usage["input_tokens"], help="Prompt tokens"
+    )
+    registry.inc(
+        "werewolf_completion_tokens_total",
+        labels,
+        usage["output_tokens"],
+        help="Completion tokens",
+    )
+    registry.inc("werewolf_tool_calls_total", labels, usage["tool_calls"], help="Tool calls")
+    registry.observe(
+        "werewolf_action_seconds", labels, usage["latency"], help="Wall time per action"
+    )
+    registry.observe(
+        "werewolf_llm_seconds", labels, usage["llm_latency"], help="Model time per action"
+    )
+
+
+def write_snapshot(path: str):
+    """Write the registry to path, as Prometheus text for .prom/.txt files, else JSON"""
+    with open(path, "w", encoding="utf-8") as file:
+        if path.endswith((".prom", ".txt")):
+            file.write(registry.prometheus())
+        else:
+            json.dump(registry.snapshot(), file, indent=2)
+
+
+def _labels(labels: Dict[str, object]) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    pairs = (f'{key}="{_escape(value)}"' for key, value in labels)
+    return "{" + ",".join(pairs) + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _header(name: str, help: Optional[str], kind: str) -> List[str]:
+    lines = [f"# HELP {name} {help}"] if help else []
+    lines.append(f"# TYPE {name} {kind}")
+    return lines
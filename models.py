@@ -0,0 +1,158 @@
+import asyncio
+from typing import Any, Dict, Optional
+
+from config import (
+    CHAT_MODEL,
+    CHAT_MODEL_BACKEND,
+    EMBEDDING_BACKEND,
+    LLM_CACHE_MODE,
+    LLM_CACHE_PATH,
+    SCHEDULER_ENABLED,
+    STUB_LATENCY,
+    STUB_THROTTLE_PROBABILITY,
+    STUB_TOOL_CALL_PROBABILITY,
+)
+
+# Process-wide backend selection; tournament and benchmark workers override it
+_backends = {
+    "chat": CHAT_MODEL_BACKEND,
+    "embeddings": EMBEDDING_BACKEND,
+    "llm_cache": LLM_CACHE_MODE,
+}
+_stub_seed: Optional[int] = None
+_stub_throttle = STUB_THROTTLE_PROBABILITY
+_stub_models_created = 0
+_shared_chat_models: Dict[str, Any] = {}
+# The shared models' async HTTP clients are bound to the loop they first ran on,
+# so every game in the process runs its concurrent ballots on this one loop
+_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def set_backends(chat: Optional[str] = None, embeddings: Optional[str] = None):
+    """Select the chat ("openai" or "stub") and embedding ("openai" or "hash") backends"""
+    if chat:
+        _backends["chat"] = chat
+    if embeddings:
+        _backends["embeddings"] = embeddings
+
+
+def set_llm_cache_mode(mode: Optional[str]):
+    """Record chat responses ("record"), serve only recorded ones ("replay") or neither ("off")"""
+    if mode:
+        _backends["llm_cache"] = mode
+
+
+def set_replay_scope(scope: str):
+    """Start a new record/replay request sequence in the shared chat models, e.g. per game"""
+    for model in _shared_chat_models.values():
+        if hasattr(model, "set_scope"):
+            model.set_scope(scope)
+
+
+def set_stub_throttle(probability: Optional[float]):
+    """Make new stub models fail this share of calls with HTTP 429, like a throttled endpoint"""
+    global _stub_throttle
+    if probability is not None:
+        _stub_throttle = probability
+
+
+def seed_stub_models(seed: Optional[int]):
+    """Make the stub models reproducible, including already shared ones"""
+    global _stub_seed, _stub_models_created
+    _stub_seed = seed
+    _stub_models_created = 0
+    for model in _shared_chat_models.values():
+        if hasattr(model, "reseed"):
+            model.reseed(seed)
+
+
+def embedding_backend() -> str:
+    return _backends["embeddings"]
+
+
+def requires_openai() -> bool:
+    replaying = _backends["llm_cache"] == "replay"
+    return _backends["embeddings"] == "openai" or (
+        _backends["chat"] == "openai" and not replaying
+    )
+
+
+def create_chat_model(model_name: str = CHAT_MODEL):
+    mode = _backends["llm_cache"]
+    if mode == "off":
+        return _create_backend_chat_model(model_name)
+
+    from llm_cache import RecordReplayChatModel
+
+    return RecordReplayChatModel(
+        recorded_model=f"{_backends['chat']}/{model_name}",
+        mode=mode,
+        path=LLM_CACHE_PATH,
+        # Replays never call a model, so none is created (and no API key needed)
+        inner=None if mode == "replay" else _create_backend_chat_model(model_name),
+    )
+
+
+def _create_backend_chat_model(model_name: str):
+    model = _create_client(model_name)
+    if not SCHEDULER_ENABLED:
+        return model
+
+    from scheduler import ScheduledChatModel
+
+    return ScheduledChatModel(inner=model, scheduled_model=f"{_backends['chat']}/{model_name}")
+
+
+def _create_client(model_name: str):
+    global _stub_models_created
+
+    if _backends["chat"] == "stub":
+        from stub_models import StubChatModel
+
+        seed = None if _stub_seed is None else _stub_seed + _stub_models_created
+        _stub_models_created += 1
+        return StubChatModel(
+            seed=seed,
+            tool_call_probability=STUB_TOOL_CALL_PROBABILITY,
+            latency=STUB_LATENCY,
+            throttle_probability=_stub_throttle,
+        )
+
+    if _backends["chat"] != "openai":
+        raise ValueError(f"Unknown chat model backend: {_backends['chat']}")
+
+    from langchain.chat_models import init_chat_model
+
+    # The scheduler retries throttled requests itself, with backoff shared across games
+    retries = 0 if SCHEDULER_ENABLED else 2
+    return init_chat_model(model_name, model_provider="openai", max_retries=retries)
+
+
+def get_shared_chat_model(model_name: str = CHAT_MODEL):
+    """One chat model client (and HTTP connection pool) per model and process"""
+    key = f"{_backends['chat']}/{model_name}"
+    if key not in _shared_chat_models:
+        _shared_chat_models[key] = create_chat_model(model_name)
+    return _shared_chat_models[key]
+
+
+def run_async(coroutine):
+    """Run coroutine to completion on the process-wide event loop"""
+    global _loop
+    if _loop is None:
+        _loop = asyncio.new_event_loop()
+    return _loop.run_until_complete(coroutine)
+
+
+def create_embeddings(model_name: str):
+    if _backends["embeddings"] == "hash":
+        from stub_models import HashEmbeddings
+
+        return HashEmbeddings()
+
+    if _backends["embeddings"] != "openai":
+        raise ValueError(f"Unknown embedding backend: {_backends['embeddings']}")
+
+    from langchain_openai import OpenAIEmbeddings
+
+    return OpenAIEmbeddings(model=model_name)
@@ -0,0 +1,201 @@
+import threading
+import uuid
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+
+class NumpyVectorIndex(VectorStore):
+    """In-process vector store for small corpora such as the rules and strategies.
+
+    Normalized embeddings are kept in one contiguous float32 matrix, so a
+    top-k query is a single matrix-vector product, and a batch of queries is
+    a single matrix-matrix product. Nothing is persisted; documents are
+    re-added (and served from the embedding cache) on start-up. Searches
+    accept a Chroma-style metadata filter, which is applied before scoring.
+    """
+
+    def __init__(self, embedding: Embeddings):
+        self.embedding = embedding
+        self._ids: List[str] = []
+        self._documents: List[Document] = []
+        self._rows: List[np.ndarray] = []
+        self._positions: Dict[str, int] = {}
+        self._matrix: Optional[np.ndarray] = None
+        self._lock = threading.Lock()
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self.embedding
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        *,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        texts = list(texts)
+        if not texts:
+            return []
+        metadatas = metadatas or [{} for _ in texts]
+        ids = [doc_id or uuid.uuid4().hex for doc_id in (ids or [None] * len(texts))]
+        vectors = self.embedding.embed_documents(texts)
+
+        with self._lock:
+            for doc_id, text, metadata, vector in zip(ids, texts, metadatas, vectors):
+                document = Document(id=doc_id, page_content=text, metadata=metadata or {})
+                row = _unit(vector)
+                if doc_id in self._positions:
+                    position = self._positions[doc_id]
+                    self._documents[position] = document
+                    self._rows[position] = row
+                else:
+                    self._positions[doc_id] = len(self._ids)
+                    self._ids.append(doc_id)
+                    self._documents.append(document)
+                    self._rows.append(row)
+            self._matrix = None
+        return ids
+
+    def get_by_ids(self, ids: Sequence[str], /) -> List[Document]:
+        with self._lock:
+            return [self._documents[self._positions[i]] for i in ids if i in self._positions]
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        with self._lock:
+            if ids is None:
+                removed = set(self._ids)
+            else:
+                removed = set(ids) & set(self._positions)
+            if not removed:
+                return False
+
+            keep = [i for i, doc_id in enumerate(self._ids) if doc_id not in removed]
+            self._ids = [self._ids[i] for i in keep]
+            self._documents = [self._documents[i] for i in keep]
+            self._rows = [self._rows[i] for i in keep]
+            self._positions = {doc_id: i for i, doc_id in enumerate(self._ids)}
+            self._matrix = None
+        return True
+
+    def delete_collection(self):
+        self.delete()
+
+    def similarity_search(
+        self, query: str, k: int = 4, filter: Optional[dict] = None, **kwargs: Any
+    ) -> List[Document]:
+        return self.similarity_search_by_vector(
+            self.embedding.embed_query(query), k=k, filter=filter
+        )
+
+    def similarity_search_with_score(
+        self, query: str, k: int = 4, filter: Optional[dict] = None, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        """(document, cosine similarity) pairs, most similar first"""
+        vector = _unit(self.embedding.embed_query(query))
+        return self._top_k(np.atleast_2d(vector), k, filter)[0]
+
+    def similarity_search_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        filter: Optional[dict] = None,
+        **kwargs: Any,
+    ) -> List[Document]:
+        hits = self._top_k(np.atleast_2d(_unit(embedding)), k, filter)[0]
+        return [doc for doc, _ in hits]
+
+    def similarity_search_batch(self, queries: List[str], k: int = 4) -> List[List[Document]]:
+        """Top-k documents for each query, embedded and scored in one batch"""
+        if not queries:
+            return []
+        vectors = np.stack([_unit(v) for v in self.embedding.embed_documents(queries)])
+        return [[doc for doc, _ in hits] for hits in self._top_k(vectors, k)]
+
+    def _select_relevance_score_fn(self):
+        # Cosine similarity in [-1, 1] mapped onto [0, 1]
+        return lambda score: (score + 1.0) / 2.0
+
+    def _top_k(
+        self, queries: np.ndarray, k: int, where: Optional[dict] = None
+    ) -> List[List[Tuple[Document, float]]]:
+        with self._lock:
+            if not self._ids:
+                return [[] for _ in queries]
+            if self._matrix is None:
+                self._matrix = np.ascontiguousarray(np.stack(self._rows))
+            documents = self._documents
+            matrix = self._matrix
+            if where:
+                rows = [i for i, doc in enumerate(documents) if _matches(doc.metadata, where)]
+                if not rows:
+                    return [[] for _ in queries]
+                documents = [documents[i] for i in rows]
+                matrix = matrix[rows]
+            scores = queries @ matrix.T
+
+        k = min(k, scores.shape[1])
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        results = []
+        for row, candidates in zip(scores, top):
+            ranked = candidates[np.argsort(-row[candidates])]
+            results.append([(documents[i], float(row[i])) for i in ranked])
+        return results
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[dict]] = None,
+        *,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> "NumpyVectorIndex":
+        index = cls(embedding)
+        index.add_texts(texts, metadatas, ids=ids)
+        return index
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+
+_OPERATORS = {
+    "$eq": lambda value, target: value == target,
+    "$ne": lambda value, target: value != target,
+    "$gt": lambda value, target: value is not None and value > target,
+    "$gte": lambda value, target: value is not None and value >= target,
+    "$lt": lambda value, target: value is not None and value < target,
+    "$lte": lambda value, target: value is not None and value <= target,
+    "$in": lambda value, target: value in target,
+    "$nin": lambda value, target: value not in target,
+}
+
+
+def _matches(metadata: dict, where: dict) -> bool:
+    """Evaluate a Chroma-style where filter against one document's metadata"""
+    for key, condition in where.items():
+        if key == "$and":
+            if not all(_matches(metadata, clause) for clause in condition):
+                return False
+        elif key == "$or":
+            if not any(_matches(metadata, clause) for clause in condition):
+                return False
+        elif isinstance(condition, dict):
+            value = metadata.get(key)
+            if not all(_OPERATORS[op](value, target) for op, target in condition.items()):
+                return False
+        elif metadata.get(key) != condition:
+            return False
+    return True
+
+
+def _unit(vector: List[float]) -> np.ndarray:
+    array = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(array)
+    return array / norm if norm else array
@@ -0,0 +1,135 @@
+import os
+import re
+import threading
+import time
+from collections.abc import Iterable
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from config import PROMPT_RELOAD_INTERVAL, PROMPTS_DIR
+
+_PLACEHOLDER = re.compile(r"\{(\w+)\}")
+
+
+class PromptTemplate:
+    """A prompt file parsed once into literal text and {placeholder} slots.
+
+    render() copies the list of parts, fills the slots it has values for
+    and joins them once. Placeholders without a value are left as written;
+    lists and other non-string iterables are joined with ", ".
+    """
+
+    def __init__(self, name: str, text: str):
+        self.name = name
+        self.text = text
+        # Literal text at even indices, the placeholders as written at odd ones
+        self._parts: List[str] = _PLACEHOLDER.split(text)
+        self._slots: List[Tuple[int, str]] = [
+            (index, self._parts[index]) for index in range(1, len(self._parts), 2)
+        ]
+        for index, slot in self._slots:
+            self._parts[index] = "{" + slot + "}"
+
+    @property
+    def placeholders(self) -> List[str]:
+        return [name for _, name in self._slots]
+
+    def render(self, **kwargs) -> str:
+        if not self._slots:
+            return self.text
+        parts = self._parts.copy()
+        for index, name in self._slots:
+            if name in kwargs:
+                parts[index] = _format(kwargs[name])
+        return "".join(parts)
+
+
+class PromptRegistry:
+    """Every prompts/*.txt template, loaded and compiled once.
+
+    Templates are registered under their file name without ".txt". With
+    watch(), a daemon thread polls the files' modification times and
+    reloads changed or new templates without a restart; version counts the
+    reloads so callers caching rendered prompts can tell they are stale.
+    """
+
+    def __init__(self, directory: str = PROMPTS_DIR):
+        self.directory = directory
+        self.version = 0
+        self._templates: Dict[str, PromptTemplate] = {}
+        self._mtimes: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._watcher: Optional[threading.Thread] = None
+        self.reload()
+
+    def get(self, name: str) -> PromptTemplate:
+        template = self._templates.get(name)
+        if template is None:
+            raise FileNotFoundError(f"Prompt template not found: {name}")
+        return template
+
+    def render(self, name: str, **kwargs) -> str:
+        return self.get(name).render(**kwargs)
+
+    def reload(self) -> List[str]:
+        """Recompile templates whose files changed since the last load; returns their names"""
+        changed = []
+        with self._lock:
+            for path in _template_paths(self.directory):
+                mtime = os.path.getmtime(path)
+                if self._mtimes.get(path) == mtime:
+                    continue
+                with open(path, "r", encoding="utf-8") as file:
+                    text = file.read()
+                name = os.path.splitext(os.path.basename(path))[0]
+                self._templates[name] = PromptTemplate(name, text)
+                self._mtimes[path] = mtime
+                changed.append(name)
+            if changed:
+                self.version += 1
+        return changed
+
+    def watch(self, interval: float):
+        """Poll for changed templates every interval seconds in a daemon thread"""
+        if self._watcher is not None:
+            return
+        self._watcher = threading.Thread(
+            target=self._watch, args=(interval,), name="prompt-watcher", daemon=True
+        )
+        self._watcher.start()
+
+    def _watch(self, interval: float):
+        while True:
+            time.sleep(interval)
+            for name in self.reload():
+                print(f"Reloaded prompt template: {name}")
+
+
+_registry: Optional[PromptRegistry] = None
+
+
+def get_prompt_registry() -> PromptRegistry:
+    """The process-wide registry, watching for edits when PROMPT_RELOAD_INTERVAL is set"""
+    global _registry
+    if _registry is None:
+        _registry = PromptRegistry()
+        if PROMPT_RELOAD_INTERVAL:
+            _registry.watch(PROMPT_RELOAD_INTERVAL)
+    return _registry
+
+
+def render_prompt(name: str, **kwargs) -> str:
+    return get_prompt_registry().render(name, **kwargs)
+
+
+def _template_paths(directory: str) -> Iterator[str]:
+    for filename in sorted(os.listdir(directory)):
+        if filename.endswith(".txt"):
+            yield os.path.join(directory, filename)
+
+
+def _format(value: object) -> str:
+    if isinstance(value, str):
+        return value
+    if isinstance(value, Iterable):
+        return ", ".join(str(item) for item in value)
+    return str(value)
@@ -0,0 +1,119 @@
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+CacheKey = Tuple[str, str, int]
+
+
+class RetrievalCache:
+    """LRU cache of similarity-search results for stores that rarely change.
+
+    Results are keyed by (store, normalized query, k). With a
+    similarity_threshold, a miss can still reuse the results of an earlier
+    query whose embedding has at least that cosine similarity. invalidate()
+    drops a store's entries when its documents change.
+    """
+
+    def __init__(self, max_entries: int = 1024, similarity_threshold: Optional[float] = None):
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._entries: "OrderedDict[CacheKey, List[Document]]" = OrderedDict()
+        self._vectors: Dict[str, Dict[CacheKey, np.ndarray]] = {}
+        self._matrices: Dict[str, Tuple[List[CacheKey], np.ndarray]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        return " ".join(re.sub(r"[^\w\s]", " ", query.lower()).split())
+
+    def get(self, store: str, query: str, k: int) -> Optional[List[Document]]:
+        key = (store, self.normalize(query), k)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+        return None
+
+    def get_similar(self, store: str, k: int, vector: List[float]) -> Optional[List[Document]]:
+        """Results of the closest cached query above the similarity threshold"""
+        query = _unit(vector)
+        with self._lock:
+            keys, matrix = self._matrix(store)
+            if keys:
+                scores = matrix @ query
+                for index in np.argsort(scores)[::-1]:
+                    if scores[index] < self.similarity_threshold:
+                        break
+                    if keys[index][2] == k:
+                        self._entries.move_to_end(keys[index])
+                        self.semantic_hits += 1
+                        return self._entries[keys[index]]
+        return None
+
+    def put(
+        self,
+        store: str,
+        query: str,
+        k: int,
+        documents: List[Document],
+        vector: Optional[List[float]] = None,
+    ):
+        key = (store, self.normalize(query), k)
+        with self._lock:
+            self._entries[key] = documents
+            self._entries.move_to_end(key)
+            if vector is not None:
+                self._vectors.setdefault(store, {})[key] = _unit(vector)
+                self._matrices.pop(store, None)
+
+            while len(self._entries) > self.max_entries:
+                evicted, _ = self._entries.popitem(last=False)
+                if self._vectors.get(evicted[0], {}).pop(evicted, None) is not None:
+                    self._matrices.pop(evicted[0], None)
+
+    def record_miss(self):
+        with self._lock:
+            self.misses += 1
+
+    def invalidate(self, store: str):
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == store]:
+                del self._entries[key]
+            self._vectors.pop(store, None)
+            self._matrices.pop(store, None)
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.semantic_hits + self.misses
+            return {
+                "hits": self.hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.semantic_hits) / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "invalidations": self.invalidations,
+            }
+
+    def _matrix(self, store: str) -> Tuple[List[CacheKey], np.ndarray]:
+        if store not in self._matrices:
+            vectors = self._vectors.get(store, {})
+            keys = list(vectors)
+            matrix = np.stack([vectors[key] for key in keys]) if keys else np.empty((0, 0))
+            self._matrices[store] = (keys, matrix)
+        return self._matrices[store]
+
+
+def _unit(vector: List[float]) -> np.ndarray:
+    array = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(array)
+    return array / norm if norm else array
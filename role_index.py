@@ -0,0 +1,97 @@
+from typing import Dict, List, Optional
+
+from alive_players import AlivePlayers
+from Player import PlayerStatus
+
+# Key of the werewolves' shared night target list among the per-player target lists
+_NIGHT = ""
+
+
+class RoleIndex:
+    """Incrementally maintained view of who is alive in which role.
+
+    add() and remove() keep the game's AlivePlayers up to date, so win
+    checks are O(1) counts. Teammate and target lists are computed once
+    per player and reused until the next elimination; callers must not
+    modify the lists they get back. check() verifies the index against
+    the game state, for the invariant debug mode.
+    """
+
+    def __init__(self, alive: AlivePlayers):
+        self.alive = alive
+        self._teammates: Dict[str, List[str]] = {}
+        self._targets: Dict[str, List[str]] = {}
+
+    def add(self, player_id: str, role: str):
+        self.alive.add(player_id, role)
+        self._invalidate()
+
+    def remove(self, player_id: str):
+        self.alive.remove(player_id)
+        self._invalidate()
+
+    def winner(self) -> Optional[str]:
+        werewolves = self.alive.count("werewolf")
+        if not werewolves:
+            return "villagers"
+        if werewolves >= self.alive.count("villager"):
+            return "werewolves"
+        return None
+
+    def teammates(self, player_id: str) -> List[str]:
+        """Alive werewolves other than player_id; empty for villagers"""
+        if player_id not in self._teammates:
+            if player_id not in self.alive or self.alive.role(player_id) != "werewolf":
+                self._teammates[player_id] = []
+            else:
+                self._teammates[player_id] = [
+                    p for p in self.alive.with_role("werewolf") if p != player_id
+                ]
+        return self._teammates[player_id]
+
+    def targets(self, player_id: str) -> List[str]:
+        """Alive players player_id may vote against: anyone else, minus werewolf teammates"""
+        if player_id not in self._targets:
+            if self.alive.role(player_id) == "werewolf":
+                self._targets[player_id] = self.night_targets()
+            else:
+                self._targets[player_id] = [p for p in self.alive if p != player_id]
+        return self._targets[player_id]
+
+    def night_targets(self) -> List[str]:
+        """Alive villagers, the werewolves' possible victims"""
+        if _NIGHT not in self._targets:
+            self._targets[_NIGHT] = self.alive.with_role("villager")
+        return self._targets[_NIGHT]
+
+    def check(self, roles: Dict[str, str], statuses: Dict[str, PlayerStatus]):
+        """Raise RuntimeError if the index disagrees with the players' roles and statuses"""
+        alive = {p for p, status in statuses.items() if status == PlayerStatus.ALIVE}
+        problems = []
+        if set(self.alive) != alive:
+            problems.append(f"alive {sorted(self.alive)} != statuses {sorted(alive)}")
+        for player_id in self.alive:
+            if self.alive.role(player_id) != roles.get(player_id):
+                problems.append(f"{player_id} indexed as {self.alive.role(player_id)}")
+        for role in set(roles.values()):
+            expected = sum(1 for p in alive if roles.get(p) == role)
+            if self.alive.count(role) != expected:
+                problems.append(f"{self.alive.count(role)} alive {role}s, expected {expected}")
+        werewolves = {p for p in alive if roles.get(p) == "werewolf"}
+        for player_id, teammates in self._teammates.items():
+            expected = werewolves - {player_id} if player_id in werewolves else set()
+            if set(teammates) != expected:
+                problems.append(f"stale teammates for {player_id}: {teammates}")
+        for player_id, targets in self._targets.items():
+            if player_id in werewolves or player_id == _NIGHT:
+                expected = alive - werewolves
+            else:
+                expected = alive - {player_id}
+            if set(targets) != expected:
+                problems.append(f"stale targets for {player_id or 'night'}: {targets}")
+        if problems:
+            raise RuntimeError("Role index out of sync: " + "; ".join(problems))
+
+    def _invalidate(self):
+        self._teammates.clear()
+        self._targets.clear()
@@ -0,0 +1,380 @@
+import asyncio
+import heapq
+import itertools
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Sequence
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
+from pydantic import PrivateAttr
+
+from config import (
+    RATE_LIMITS,
+    SCHEDULER_BACKOFF_BASE,
+    SCHEDULER_BACKOFF_MAX,
+    SCHEDULER_MAX_RETRIES,
+)
+from metrics import registry
+
+# Lower runs first: ballots in progress, then player turns, then everything else
+PRIORITY_VOTE = 0
+PRIORITY_TURN = 1
+PRIORITY_DEFAULT = 2
+
+_priority: ContextVar[int] = ContextVar("llm_priority", default=PRIORITY_DEFAULT)
+
+# How long a queued request sleeps before checking again whether it may run
+_POLL_INTERVAL = 0.01
+
+
+@contextmanager
+def llm_priority(priority: int):
+    """Run model calls made in this block at the given priority"""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def is_rate_limited(error: BaseException) -> bool:
+    return getattr(error, "status_code", None) == 429 or type(error).__name__ == "RateLimitError"
+
+
+class TokenBucket:
+    """Allows `per_minute` units a minute, refilled continuously, bursting up to the limit"""
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.available = per_minute
+        self._updated = time.monotonic()
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until amount is available; 0 means it is available now"""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.available >= amount:
+            return 0.0
+        return (amount - self.available) / self.rate
+
+    def take(self, amount: float):
+        self._refill()
+        self.available -= amount
+
+    def _refill(self):
+        now = time.monotonic()
+        self.available = min(self.capacity, self.available + (now - self._updated) * self.rate)
+        self._updated = now
+
+
+class LLMScheduler:
+    """Admits model requests in priority order within per-model rate limits.
+
+    Models are named "<backend>/<model>" and each may have a requests-per-minute
+    and a tokens-per-minute token bucket. Requests for a limited model wait in
+    that model's priority queue (FIFO within a priority) and only its head is
+    admitted, once the buckets allow it; requests for unlimited models are
+    admitted straight away. Throttled requests (HTTP 429) are retried with
+    jittered exponential backoff. Limits are per process; share scales them
+    down when several processes split one account's limits.
+    """
+
+    def __init__(self, limits: Dict[str, Dict[str, float]], share: float = 1.0):
+        self.limits = limits
+        self.share = share
+        self._buckets: Dict[str, Dict[str, Optional[TokenBucket]]] = {}
+        self._queues: Dict[str, List[list]] = {}
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self.admitted = 0
+        self.retries = 0
+        self.failures = 0
+        self.max_queue_depth = 0
+        self.wait_time = 0.0
+
+    def call(self, model: str, tokens: int, function: Callable[[], Any]):
+        """Run function once admitted, retrying it when it is throttled"""
+        for attempt in range(SCHEDULER_MAX_RETRIES + 1):
+            ticket = self._enqueue(model, tokens)
+            try:
+                while True:
+                    delay = self._try_admit(ticket)
+                    if delay == 0:
+                        break
+                    time.sleep(delay)
+            except BaseException:
+                self._abandon(ticket)
+                raise
+            try:
+                return function()
+            except Exception as error:
+                if not self._should_retry(error, attempt):
+                    raise
+            time.sleep(self._backoff(attempt))
+
+    async def acall(self, model: str, tokens: int, function: Callable[[], Any]):
+        """Async counterpart of call; function returns an awaitable"""
+        for attempt in range(SCHEDULER_MAX_RETRIES + 1):
+            ticket = self._enqueue(model, tokens)
+            try:
+                while True:
+                    delay = self._try_admit(ticket)
+                    if delay == 0:
+                        break
+                    await asyncio.sleep(delay)
+            except BaseException:
+                # e.g. a cancelled ballot; a ticket left at the head would block everyone
+                self._abandon(ticket)
+                raise
+            try:
+                return await function()
+            except Exception as error:
+                if not self._should_retry(error, attempt):
+                    raise
+            await asyncio.sleep(self._backoff(attempt))
+
+    def settle(self, model: str, estimated: int, actual: Optional[int]):
+        """Charge the token bucket the difference between estimated and actual usage"""
+        if actual is None:
+            return
+        with self._lock:
+            buckets = self._model_buckets(model)
+            if buckets["tokens"] is not None:
+                buckets["tokens"].take(actual - estimated)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "queue_depth": self._queue_depth(),
+                "max_queue_depth": self.max_queue_depth,
+                "admitted": self.admitted,
+                "retries": self.retries,
+                "failures": self.failures,
+                "wait_time": self.wait_time,
+            }
+
+    def _enqueue(self, model: str, tokens: int) -> list:
+        ticket = [_priority.get(), next(self._sequence), model, tokens, time.monotonic()]
+        with self._lock:
+            heapq.heappush(self._queues.setdefault(model, []), ticket)
+            self.max_queue_depth = max(self.max_queue_depth, self._queue_depth())
+        return ticket
+
+    def _queue_depth(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    def _abandon(self, ticket: list):
+        """Drop a ticket whose caller stopped waiting for admission"""
+        with self._lock:
+            self._remove(ticket)
+
+    def _remove(self, ticket: list):
+        queue = self._queues.get(ticket[2], [])
+        for index, queued in enumerate(queue):
+            if queued is ticket:
+                queue.pop(index)
+                heapq.heapify(queue)
+                return
+
+    def _try_admit(self, ticket: list) -> float:
+        """0 once the ticket is admitted, otherwise how long to wait before asking again"""
+        priority, _, model, tokens, queued = ticket
+        with self._lock:
+            buckets = self._model_buckets(model)
+            if buckets["requests"] is None and buckets["tokens"] is None:
+                # An unlimited model has nothing to wait for, so queue order doesn't matter
+                self._remove(ticket)
+            else:
+                if self._queues[model][0] is not ticket:
+                    return _POLL_INTERVAL
+
+                delay = max(
+                    buckets["requests"].wait_time(1) if buckets["requests"] else 0.0,
+                    buckets["tokens"].wait_time(tokens) if buckets["tokens"] else 0.0,
+                )
+                if delay:
+                    return min(delay, 1.0)
+
+                if buckets["requests"]:
+                    buckets["requests"].take(1)
+                if buckets["tokens"]:
+                    buckets["tokens"].take(tokens)
+                heapq.heappop(self._queues[model])
+            waited = time.monotonic() - queued
+            self.admitted += 1
+            self.wait_time += waited
+
+        registry.observe(
+            "werewolf_scheduler_wait_seconds",
+            {"model": model, "priority": priority},
+            waited,
+            help="Time model requests waited for admission",
+        )
+        return 0.0
+
+    def _model_buckets(self, model: str) -> Dict[str, Optional[TokenBucket]]:
+        if model not in self._buckets:
+            backend = model.split("/", 1)[0]
+            limits = self.limits.get(model, self.limits.get(f"{backend}/default", {}))
+            rpm = limits.get("requests_per_minute")
+            tpm = limits.get("tokens_per_minute")
+            self._buckets[model] = {
+                "requests": TokenBucket(rpm * self.share) if rpm else None,
+                "tokens": TokenBucket(tpm * self.share) if tpm else None,
+            }
+        return self._buckets[model]
+
+    def _should_retry(self, error: BaseException, attempt: int) -> bool:
+        if not is_rate_limited(error):
+            return False
+        with self._lock:
+            if attempt >= SCHEDULER_MAX_RETRIES:
+                self.failures += 1
+                return False
+            self.retries += 1
+        registry.inc(
+            "werewolf_scheduler_retries_total",
+            {"error": type(error).__name__},
+            help="Throttled model requests retried",
+        )
+        return True
+
+    def _backoff(self, attempt: int) -> float:
+        delay = min(SCHEDULER_BACKOFF_MAX, SCHEDULER_BACKOFF_BASE * 2**attempt)
+        return delay * random.uniform(0.5, 1.5)
+
+
+_scheduler: Optional[LLMScheduler] = None
+
+
+def get_scheduler() -> LLMScheduler:
+    """The process-wide scheduler every scheduled chat model goes through"""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = LLMScheduler(RATE_LIMITS)
+    return _scheduler
+
+
+def set_rate_limit_share(share: float):
+    """Scale this process's limits, e.g. to 1/workers in a tournament worker"""
+    get_scheduler().share = share
+
+
+class ScheduledChatModel(BaseChatModel):
+    """Chat model wrapper that sends every request through the shared LLMScheduler"""
+
+    inner: Any
+    scheduled_model: str
+
+    _scheduler: Any = PrivateAttr(default=None)
+
+    def model_post_init(self, __context: Any):
+        super().model_post_init(__context)
+        self._scheduler = get_scheduler()
+
+    @property
+    def _llm_type(self) -> str:
+        return f"scheduled:{self.inner._llm_type}"
+
+    def reseed(self, seed: Optional[int]):
+        if hasattr(self.inner, "reseed"):
+            self.inner.reseed(seed)
+
+    def bind_tools(self, tools: Sequence[Any], *, tool_choice: Any = None, **kwargs: Any):
+        bound = self.inner.bind_tools(tools, tool_choice=tool_choice, **kwargs)
+        return self.bind(**bound.kwargs)
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        tokens = _estimate_tokens(messages)
+        result = self._scheduler.call(
+            self.scheduled_model,
+            tokens,
+            lambda: self.inner._generate(messages, stop=stop, **kwargs),
+        )
+        self._scheduler.settle(self.scheduled_model, tokens, _total_tokens(result))
+        return result
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        tokens = _estimate_tokens(messages)
+        result = await self._scheduler.acall(
+            self.scheduled_model,
+            tokens,
+            lambda: self.inner._agenerate(messages, stop=stop, **kwargs),
+        )
+        self._scheduler.settle(self.scheduled_model, tokens, _total_tokens(result))
+        return result
+
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        # Throttling surfaces before the first chunk, so only that part is retried
+        def start():
+            chunks = self.inner._stream(messages, stop=stop, **kwargs)
+            return next(chunks, None), chunks
+
+        tokens = _estimate_tokens(messages)
+        first, chunks = self._scheduler.call(self.scheduled_model, tokens, start)
+        usage = None
+        if first is not None:
+            for chunk in itertools.chain([first], chunks):
+                usage = chunk.message.usage_metadata or usage
+                yield chunk
+        self._scheduler.settle(
+            self.scheduled_model, tokens, usage.get("total_tokens") if usage else None
+        )
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        async def start():
+            chunks = self.inner._astream(messages, stop=stop, **kwargs)
+            return await anext(chunks, None), chunks
+
+        tokens = _estimate_tokens(messages)
+        first, chunks = await self._scheduler.acall(self.scheduled_model, tokens, start)
+        usage = None
+        if first is not None:
+            usage = first.message.usage_metadata
+            yield first
+            async for chunk in chunks:
+                usage = chunk.message.usage_metadata or usage
+                yield chunk
+        self._scheduler.settle(
+            self.scheduled_model, tokens, usage.get("total_tokens") if usage else None
+        )
+
+
+def _estimate_tokens(messages: List[BaseMessage]) -> int:
+    return sum(len(str(message.content)) for message in messages) // 4 + 1
+
+
+def _total_tokens(result: ChatResult) -> Optional[int]:
+    usage = getattr(result.generations[0].message, "usage_metadata", None) if result.generations else None
+    return usage.get("total_tokens") if usage else None
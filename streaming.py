@@ -0,0 +1,67 @@
+import sys
+from typing import Any, AsyncIterator, Callable, Iterator, Optional, Tuple
+
+# The create_react_agent node that calls the model
+AGENT_NODE = "agent"
+
+# Receives (player_id, token) for every model token of a player's reply
+TokenCallback = Callable[[str, str], None]
+
+
+class ConsoleTokenPrinter:
+    """Token callback that prints replies live, starting a line whenever the speaker changes"""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+        self._speaker: Optional[str] = None
+
+    def __call__(self, player_id: str, token: str):
+        if self._speaker != player_id:
+            self.stream.write(f"\n{player_id} > ")
+            self._speaker = player_id
+        self.stream.write(token)
+        self.stream.flush()
+
+
+STREAM_MODES = ["messages", "updates"]
+
+
+def collect_stream(
+    events: Iterator[Tuple[str, Any]], player_id: str, on_token: Optional[TokenCallback]
+) -> str:
+    """Final reply of an agent run streamed with stream_mode=STREAM_MODES.
+
+    Model tokens from "messages" events go to on_token as they arrive; the
+    reply is the last message of the agent node's final "updates" event, so
+    no intermediate state snapshots are kept.
+    """
+    response = ""
+    for mode, data in events:
+        response = _handle(mode, data, player_id, on_token, response)
+    return response
+
+
+async def acollect_stream(
+    events: AsyncIterator[Tuple[str, Any]], player_id: str, on_token: Optional[TokenCallback]
+) -> str:
+    """Async counterpart of collect_stream"""
+    response = ""
+    async for mode, data in events:
+        response = _handle(mode, data, player_id, on_token, response)
+    return response
+
+
+def _handle(
+    mode: str, data: Any, player_id: str, on_token: Optional[TokenCallback], response: str
+) -> str:
+    if mode == "messages":
+        chunk, metadata = data
+        if on_token and metadata.get("langgraph_node") == AGENT_NODE:
+            if isinstance(chunk.content, str) and chunk.content:
+                on_token(player_id, chunk.content)
+        return response
+
+    update = data.get(AGENT_NODE) if mode == "updates" else None
+    if update and update.get("messages"):
+        return update["messages"][-1].content
+    return response
@@ -0,0 +1,296 @@
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+import time
+from typing import Any, AsyncIterator, Iterator, List, Optional, Sequence
+
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from pydantic import PrivateAttr
+
+# Labels the phase prompts use to list the players an answer may name
+_CHOICE_LABELS = re.compile(
+    r"(Available players to vote for|Potential targets|Choose one player from|Alive players):\s*(.+)"
+)
+
+_DISCUSSION_LINES = [
+    "I have been watching {player} closely and something feels off.",
+    "I trust {player} for now, but I want to hear more from everyone.",
+    "{player} has been very quiet today, which makes me suspicious.",
+    "Let's not rush. {player}, what do you think happened last night?",
+]
+
+
+class StubRateLimitError(Exception):
+    """Throttling error raised by the stub model, shaped like a provider's HTTP 429"""
+
+    status_code = 429
+
+
+class StubChatModel(BaseChatModel):
+    """Offline chat model that speaks LangChain's chat-model interface.
+
+    In "scripted" mode replies cycle through `responses`. In "random" mode
+    it answers the phase prompt with a plausible random choice. Either way
+    it may first call one of the bound tools, and it always honours a
+    forced tool choice, so create_react_agent and with_structured_output
+    both work without network access. Streamed replies arrive word by
+    word. With throttle_probability it fails that share of calls with
+    StubRateLimitError, like a throttled endpoint.
+    """
+
+    mode: str = "random"
+    responses: List[str] = []
+    tool_call_probability: float = 0.3
+    latency: float = 0.0
+    throttle_probability: float = 0.0
+    seed: Optional[int] = None
+
+    _rng: Optional[random.Random] = PrivateAttr(default=None)
+    # Separate from _rng so throttling does not change the replies
+    _throttle_rng: Optional[random.Random] = PrivateAttr(default=None)
+    _script_index: int = PrivateAttr(default=0)
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub"
+
+    def bind_tools(self, tools: Sequence[Any], *, tool_choice: Any = None, **kwargs: Any):
+        formatted_tools = [convert_to_openai_tool(tool) for tool in tools]
+        return self.bind(tools=formatted_tools, tool_choice=tool_choice, **kwargs)
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        if self.latency:
+            time.sleep(self.latency)
+        self._throttle()
+        return self._result(messages, **kwargs)
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self._throttle()
+        return self._result(messages, **kwargs)
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        result = self._generate(messages, stop=stop, **kwargs)
+        yield from _chunks(result.generations[0].message)
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        result = await self._agenerate(messages, stop=stop, **kwargs)
+        for chunk in _chunks(result.generations[0].message):
+            yield chunk
+
+    def reseed(self, seed: Optional[int]):
+        self._rng = random.Random(seed)
+        self._throttle_rng = random.Random(seed)
+        self._script_index = 0
+
+    def _throttle(self):
+        if not self.throttle_probability:
+            return
+        if self._throttle_rng is None:
+            self._throttle_rng = random.Random(self.seed)
+        if self._throttle_rng.random() < self.throttle_probability:
+            raise StubRateLimitError("429 Too Many Requests (stub throttling)")
+
+    def _random(self) -> random.Random:
+        if self._rng is None:
+            self._rng = random.Random(self.seed)
+        return self._rng
+
+    def _result(
+        self,
+        messages: List[BaseMessage],
+        tools: Optional[List[dict]] = None,
+        tool_choice: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        message = self._reply(messages, tools or [], tool_choice)
+        prompt_tokens = sum(len(_text(m)) for m in messages) // 4 + 1
+        completion_tokens = len(_text(message)) // 4 + 1
+        message.usage_metadata = {
+            "input_tokens": prompt_tokens,
+            "output_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _reply(
+        self, messages: List[BaseMessage], tools: List[dict], tool_choice: Any
+    ) -> AIMessage:
+        rng = self._random()
+
+        if tools and tool_choice not in (None, "none", "auto"):
+            return AIMessage(
+                content="", tool_calls=[self._tool_call(_forced_tool(tools, tool_choice), messages)]
+            )
+
+        answered_tool = messages and isinstance(messages[-1], ToolMessage)
+        if tools and not answered_tool and rng.random() < self.tool_call_probability:
+            return AIMessage(
+                content="", tool_calls=[self._tool_call(rng.choice(tools), messages)]
+            )
+
+        if self.mode == "scripted" and self.responses:
+            content = self.responses[self._script_index % len(self.responses)]
+            self._script_index += 1
+            return AIMessage(content=content)
+
+        return AIMessage(content=self._random_answer(messages))
+
+    def _random_answer(self, messages: List[BaseMessage]) -> str:
+        rng = self._random()
+        prompt = "\n".join(_text(m) for m in messages if not isinstance(m, AIMessage))
+
+        if "continue discussion" in prompt and "move to voting" in prompt:
+            return rng.choice(["continue discussion", "move to voting"])
+
+        choices = _prompt_choices(prompt)
+        if not choices:
+            return "I don't have enough information yet."
+
+        player = rng.choice(choices)
+        if "DISCUSSION PHASE" in prompt and "VOTING PHASE" not in prompt:
+            return rng.choice(_DISCUSSION_LINES).format(player=player)
+        return player
+
+    def _tool_call(self, tool: dict, messages: List[BaseMessage]) -> dict:
+        rng = self._random()
+        function = tool["function"]
+        parameters = function.get("parameters", {})
+        prompt_words = re.findall(r"[A-Za-z]+", _text(messages[-1])) if messages else []
+
+        args = {}
+        for name, schema in parameters.get("properties", {}).items():
+            if name not in parameters.get("required", []):
+                continue
+            if "enum" in schema:
+                args[name] = rng.choice(schema["enum"])
+            elif schema.get("type") == "integer":
+                args[name] = rng.randint(1, 3)
+            elif schema.get("type") == "number":
+                args[name] = rng.random()
+            elif schema.get("type") == "boolean":
+                args[name] = rng.random() < 0.5
+            else:
+                args[name] = " ".join(prompt_words[:6]) or "werewolf strategy"
+
+        return {
+            "name": function["name"],
+            "args": args,
+            "id": f"call_{rng.getrandbits(48):012x}",
+            "type": "tool_call",
+        }
+
+
+class HashEmbeddings(Embeddings):
+    """Deterministic offline embeddings from hashed word features"""
+
+    def __init__(self, dimensions: int = 256):
+        self.dimensions = dimensions
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+    def _embed(self, text: str) -> List[float]:
+        vector = [0.0] * self.dimensions
+        for token in re.findall(r"\w+", text.lower()):
+            value = int.from_bytes(
+                hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little"
+            )
+            vector[value % self.dimensions] += 1.0 if value >> 63 else -1.0
+
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+
+def _chunks(message: AIMessage) -> Iterator[ChatGenerationChunk]:
+    """A reply split into word tokens (or one tool-call chunk), usage on the last chunk"""
+    if message.tool_calls:
+        tool_call_chunks = [
+            {
+                "name": call["name"],
+                "args": json.dumps(call["args"]),
+                "id": call["id"],
+                "index": index,
+            }
+            for index, call in enumerate(message.tool_calls)
+        ]
+        yield ChatGenerationChunk(
+            message=AIMessageChunk(
+                content="",
+                tool_call_chunks=tool_call_chunks,
+                usage_metadata=message.usage_metadata,
+            )
+        )
+        return
+
+    tokens = re.findall(r"\s*\S+", message.content) or [message.content]
+    for index, token in enumerate(tokens):
+        last = index == len(tokens) - 1
+        yield ChatGenerationChunk(
+            message=AIMessageChunk(
+                content=token, usage_metadata=message.usage_metadata if last else None
+            )
+        )
+
+
+def _text(message: BaseMessage) -> str:
+    return message.content if isinstance(message.content, str) else str(message.content)
+
+
+def _forced_tool(tools: List[dict], tool_choice: Any) -> dict:
+    """Resolve a forced tool choice ("any", a tool name or an OpenAI dict)"""
+    if isinstance(tool_choice, dict):
+        tool_choice = tool_choice.get("function", {}).get("name")
+    for tool in tools:
+        if tool["function"]["name"] == tool_choice:
+            return tool
+    return tools[0]
+
+
+def _prompt_choices(prompt: str) -> List[str]:
+    """Player names listed under the most specific label in the prompt"""
+    matches = _CHOICE_LABELS.findall(prompt)
+    if not matches:
+        return []
+
+    # Prefer the narrower candidate lists over "Alive players"
+    narrower = [line for label, line in matches if label != "Alive players"]
+    line = narrower[-1] if narrower else matches[-1][1]
+
+    names = re.split(r",\s*", line.strip().strip("[]"))
+    return [name.strip().strip("'\"") for name in names if name.strip().strip("'\"")]
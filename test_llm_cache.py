@@ -0,0 +1,114 @@
+import json
+
+import pytest
+
+pytest.importorskip("langchain_openai")
+
+import httpx
+from langchain_core.messages import HumanMessage
+from langchain_core.tools import tool
+from langchain_openai import ChatOpenAI
+from pydantic import BaseModel
+
+from llm_cache import RecordReplayChatModel
+from stub_models import StubChatModel
+
+
+@tool
+def lookup(query: str) -> str:
+    """Look something up"""
+    return query
+
+
+class Vote(BaseModel):
+    """A ballot"""
+
+    target: str
+
+
+def fake_openai(requests):
+    """ChatOpenAI against an in-process endpoint that calls the first bound tool"""
+
+    def handle(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        requests.append(body)
+        message = {"role": "assistant", "content": "hello"}
+        if body.get("tools"):
+            name = body["tools"][0]["function"]["name"]
+            arguments = {"query": "rules"} if name == "lookup" else {"target": "alice"}
+            message = {
+                "role": "assistant",
+                "content": None,
+                "tool_calls": [
+                    {
+                        "id": f"call_{len(requests)}",
+                        "type": "function",
+                        "function": {"name": name, "arguments": json.dumps(arguments)},
+                    }
+                ],
+            }
+        return httpx.Response(
+            200,
+            json={
+                "id": "chatcmpl-1",
+                "object": "chat.completion",
+                "created": 0,
+                "model": "gpt-4o-mini",
+                "choices": [{"index": 0, "message": message, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+            },
+        )
+
+    return ChatOpenAI(
+        model="gpt-4o-mini",
+        api_key="test",
+        max_retries=0,
+        http_client=httpx.Client(transport=httpx.MockTransport(handle)),
+    )
+
+
+def run(model):
+    messages = [HumanMessage(content="Who do you vote for?")]
+    return (
+        model.bind_tools([lookup]).invoke(messages).tool_calls[0]["args"],
+        model.bind_tools([lookup], tool_choice="any").invoke(messages).tool_calls[0]["args"],
+        model.with_structured_output(Vote).invoke(messages),
+        model.invoke(messages).content,
+    )
+
+
+def test_openai_recordings_replay(tmp_path):
+    path = str(tmp_path / "llm_cache.sqlite")
+    requests = []
+    recorder = RecordReplayChatModel(
+        recorded_model="openai/gpt-4o-mini", mode="record", path=path, inner=fake_openai(requests)
+    )
+    recorded = run(recorder)
+
+    # The wrapped model still receives tools and tool_choice in its own format
+    assert "tool_choice" not in requests[0]
+    assert requests[1]["tool_choice"] == "required"
+
+    replayer = RecordReplayChatModel(recorded_model="openai/gpt-4o-mini", mode="replay", path=path)
+    assert run(replayer) == recorded
+    assert len(requests) == 4
+
+
+def test_streamed_recordings_stream_and_replay(tmp_path):
+    path = str(tmp_path / "llm_cache.sqlite")
+    messages = [HumanMessage(content="DISCUSSION PHASE\nAlive players: Alice, Bob, Eve")]
+    recorder = RecordReplayChatModel(
+        recorded_model="stub/gpt-4o-mini",
+        mode="record",
+        path=path,
+        inner=StubChatModel(seed=3, tool_call_probability=0.0),
+    )
+    chunks = list(recorder.stream(messages))
+    # The wrapped model's chunks are forwarded as they arrive
+    assert len(chunks) > 1
+    recorded = "".join(chunk.content for chunk in chunks)
+
+    replayer = RecordReplayChatModel(recorded_model="stub/gpt-4o-mini", mode="replay", path=path)
+    assert "".join(chunk.content for chunk in replayer.stream(messages)) == recorded
+    replayer.set_scope("")
+    assert replayer.invoke(messages).content == recorded
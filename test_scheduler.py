@@ -0,0 +1,160 @@
+import asyncio
+import time
+
+import pytest
+
+pytest.importorskip("langchain_core")
+
+import scheduler as scheduler_module
+from config import RATE_LIMITS
+from scheduler import (
+    PRIORITY_DEFAULT,
+    PRIORITY_TURN,
+    PRIORITY_VOTE,
+    LLMScheduler,
+    llm_priority,
+)
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    scheduler = LLMScheduler({"slow": {"requests_per_minute": 1}})
+
+    async def noop():
+        return "ok"
+
+    async def main():
+        # Use the only request of the minute, so the next one has to wait
+        await scheduler.acall("slow", 1, noop)
+
+        with llm_priority(PRIORITY_VOTE):
+            waiter = asyncio.create_task(scheduler.acall("slow", 1, noop))
+        await asyncio.sleep(0.05)
+        assert scheduler.stats()["queue_depth"] == 1
+
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert scheduler.stats()["queue_depth"] == 0
+
+        # An unlimited model is admitted straight away instead of queueing behind it
+        return await asyncio.wait_for(scheduler.acall("fast", 1, noop), timeout=1)
+
+    assert asyncio.run(main()) == "ok"
+
+
+def test_queued_requests_are_admitted_in_priority_order():
+    # 10 tokens a second once the initial burst is used up
+    scheduler = LLMScheduler({"openai/limited": {"tokens_per_minute": 600}})
+    admitted = []
+
+    def record(name):
+        async def call():
+            admitted.append(name)
+
+        return call
+
+    async def request(name, priority):
+        with llm_priority(priority):
+            await scheduler.acall("openai/limited", 1, record(name))
+
+    async def main():
+        await scheduler.acall("openai/limited", 600, record("burst"))
+        await asyncio.gather(
+            request("default", PRIORITY_DEFAULT),
+            request("turn", PRIORITY_TURN),
+            request("vote", PRIORITY_VOTE),
+        )
+
+    asyncio.run(main())
+    assert admitted == ["burst", "vote", "turn", "default"]
+
+
+def test_a_waiting_model_does_not_block_other_models():
+    scheduler = LLMScheduler(
+        {"openai/slow": {"requests_per_minute": 1}, "openai/other": {"requests_per_minute": 60}}
+    )
+
+    async def noop():
+        return "ok"
+
+    async def main():
+        await scheduler.acall("openai/slow", 1, noop)
+        with llm_priority(PRIORITY_VOTE):
+            waiter = asyncio.create_task(scheduler.acall("openai/slow", 1, noop))
+        await asyncio.sleep(0.05)
+        try:
+            return await asyncio.wait_for(scheduler.acall("openai/other", 1, noop), timeout=1)
+        finally:
+            waiter.cancel()
+
+    assert asyncio.run(main()) == "ok"
+
+
+def test_the_stub_backend_is_unlimited_by_default():
+    scheduler = LLMScheduler(RATE_LIMITS)
+    buckets = scheduler._model_buckets("stub/gpt-4o-mini")
+    assert buckets == {"requests": None, "tokens": None}
+    assert scheduler._model_buckets("openai/gpt-4o-mini")["requests"] is not None
+
+
+class Throttled(Exception):
+    status_code = 429
+
+
+def test_throttled_requests_are_retried_with_backoff(monkeypatch):
+    monkeypatch.setattr(scheduler_module, "SCHEDULER_BACKOFF_BASE", 0.001)
+    scheduler = LLMScheduler({})
+    attempts = []
+
+    def flaky():
+        attempts.append(time.monotonic())
+        if len(attempts) < 3:
+            raise Throttled()
+        return "ok"
+
+    assert scheduler.call("stub/model", 1, flaky) == "ok"
+    assert len(attempts) == 3
+    assert scheduler.stats()["retries"] == 2
+    assert scheduler.stats()["failures"] == 0
+
+
+def test_retries_stop_after_the_limit_and_other_errors_are_not_retried(monkeypatch):
+    monkeypatch.setattr(scheduler_module, "SCHEDULER_BACKOFF_BASE", 0.001)
+    monkeypatch.setattr(scheduler_module, "SCHEDULER_MAX_RETRIES", 2)
+    scheduler = LLMScheduler({})
+    calls = []
+
+    def throttled():
+        calls.append(1)
+        raise Throttled()
+
+    with pytest.raises(Throttled):
+        scheduler.call("stub/model", 1, throttled)
+    assert len(calls) == 3
+    assert scheduler.stats()["failures"] == 1
+
+    def broken():
+        calls.append(1)
+        raise ValueError("bad request")
+
+    with pytest.raises(ValueError):
+        scheduler.call("stub/model", 1, broken)
+    assert len(calls) == 4
+    assert scheduler.stats()["retries"] == 2
+
+
+def test_settle_charges_the_difference_between_estimated_and_actual_tokens():
+    scheduler = LLMScheduler({"openai/model": {"tokens_per_minute": 6000}})
+    scheduler.call("openai/model", 1000, lambda: None)
+    bucket = scheduler._model_buckets("openai/model")["tokens"]
+    assert bucket.available == pytest.approx(5000, abs=5)
+
+    scheduler.settle("openai/model", 1000, 2500)
+    assert bucket.available == pytest.approx(3500, abs=5)
+
+    scheduler.settle("openai/model", 1000, 200)
+    assert bucket.available == pytest.approx(4300, abs=5)
+
+    # Unknown usage leaves the estimate in place
+    scheduler.settle("openai/model", 1000, None)
+    assert bucket.available == pytest.approx(4300, abs=5)
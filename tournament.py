@@ -0,0 +1,242 @@
+"""Play many independent games across a process pool and report win rates.
+
+Usage:
+    python tournament.py --games 100 --workers 8 --seed 42 --output report.json
+    python tournament.py --games 1000 --chat-backend stub --embedding-backend hash
+    python tournament.py --games 20 --llm-cache replay
+    python tournament.py --games 4 --players 200 --werewolves 40 --chat-backend stub
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Optional
+
+from config import AGENT_CALLS_PER_DECISION, PLAYER_NUM, WEREWOLF_NUM
+from controller import Controller
+from decision import calls_per_decision, set_decision_mode
+from game_rag import GameRAG
+from main import add_strategy_knowledge, new_game_state, player_names
+from models import (
+    seed_stub_models,
+    set_backends,
+    set_llm_cache_mode,
+    set_replay_scope,
+)
+from scheduler import set_rate_limit_share
+
+# One GameRAG per worker process; every game gets its own conversation namespace
+_worker_rag: Optional[GameRAG] = None
+
+
+def _get_worker_rag() -> GameRAG:
+    global _worker_rag
+    if _worker_rag is None:
+        _worker_rag = GameRAG()
+        add_strategy_knowledge(_worker_rag, new_game_state())
+    return _worker_rag
+
+
+def _init_worker(
+    chat_backend: Optional[str],
+    embedding_backend: Optional[str],
+    decision_mode: Optional[str],
+    llm_cache: Optional[str],
+    workers: int,
+):
+    set_backends(chat_backend, embedding_backend)
+    set_decision_mode(decision_mode)
+    set_llm_cache_mode(llm_cache)
+    # Workers split the account's rate limits evenly
+    set_rate_limit_share(1 / workers)
+
+
+def play_tournament_game(
+    game_index: int,
+    seed: int,
+    verbose: bool = False,
+    players: int = PLAYER_NUM,
+    werewolves: int = WEREWOLF_NUM,
+) -> Dict:
+    """Play a single seeded game in the current process and return its summary"""
+    game_id = f"g{seed}-{game_index}"
+    seed_stub_models(seed)
+    rag = _get_worker_rag()
+    set_replay_scope(game_id)
+    rag.use_conversation_namespace(f"conversation-{game_id}")
+
+    game = Controller(rag, new_game_state(), game_id=game_id, seed=seed)
+
+    start = time.perf_counter()
+    with open(os.devnull, "w") as devnull:
+        output = (
+            contextlib.nullcontext() if verbose else contextlib.redirect_stdout(devnull)
+        )
+        with output:
+            game.setup_game(player_names(players), werewolves)
+            result = game.play_game()
+
+    result["seed"] = seed
+    result["wall_time"] = time.perf_counter() - start
+    return result
+
+
+class TournamentReport:
+    """Aggregates per-game results as they stream in"""
+
+    def __init__(self):
+        self.games = 0
+        self.errors = 0
+        self.wins: Dict[str, int] = {}
+        self.total_days = 0
+        self.total_llm_calls = 0
+        self.total_llm_calls_saved_estimate = 0.0
+        self.total_decisions = 0
+        self.total_decision_calls = 0
+        self.total_game_time = 0.0
+        self.results = []
+
+    def add(self, result: Dict):
+        self.games += 1
+        self.wins[result["winner"]] = self.wins.get(result["winner"], 0) + 1
+        self.total_days += result["days"]
+        self.total_llm_calls += result["llm_calls"]
+        self.total_llm_calls_saved_estimate += result["llm_calls_saved_estimate"]
+        self.total_decisions += result["decisions"]
+        self.total_decision_calls += result["decision_calls"]
+        self.total_game_time += result["wall_time"]
+        self.results.append(result)
+
+    def add_error(self, game_index: int, seed: int, error: BaseException):
+        self.errors += 1
+        self.results.append({
+            "game_index": game_index,
+            "seed": seed,
+            "error": repr(error),
+        })
+
+    def summary(self, elapsed: float) -> Dict:
+        games = max(self.games, 1)
+        return {
+            "games": self.games,
+            "errors": self.errors,
+            "win_rates": {side: count / games for side, count in self.wins.items()},
+            "average_days": self.total_days / games,
+            "average_llm_calls": self.total_llm_calls / games,
+            "decision_calls_per_decision": calls_per_decision(
+                self.total_decisions, self.total_decision_calls
+            ),
+            # Assumes AGENT_CALLS_PER_DECISION calls per decision in agent mode
+            "average_llm_calls_saved_estimate": self.total_llm_calls_saved_estimate / games,
+            "average_game_time": self.total_game_time / games,
+            "elapsed": elapsed,
+            "games_per_minute": 60 * self.games / elapsed if elapsed else 0.0,
+        }
+
+
+def run_tournament(
+    num_games: int,
+    workers: Optional[int] = None,
+    base_seed: int = 0,
+    verbose: bool = False,
+    chat_backend: Optional[str] = None,
+    embedding_backend: Optional[str] = None,
+    decision_mode: Optional[str] = None,
+    llm_cache: Optional[str] = None,
+    players: int = PLAYER_NUM,
+    werewolves: int = WEREWOLF_NUM,
+) -> Dict:
+    """Run num_games independent games across a process pool"""
+    report = TournamentReport()
+    start = time.perf_counter()
+    workers = workers or os.cpu_count() or 1
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(chat_backend, embedding_backend, decision_mode, llm_cache, workers),
+    ) as pool:
+        futures = {
+            pool.submit(
+                play_tournament_game, index, base_seed + index, verbose, players, werewolves
+            ): index
+            for index in range(num_games)
+        }
+
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                result = future.result()
+            except Exception as error:
+                report.add_error(index, base_seed + index, error)
+                print(f"[{report.games + report.errors}/{num_games}] game {index} failed: {error!r}")
+                continue
+
+            report.add(result)
+            print(
+                f"[{report.games + report.errors}/{num_games}] {result['game_id']}: "
+                f"{result['winner']} win after {result['days']} days, "
+                f"{result['llm_calls']} LLM calls"
+            )
+
+    summary = report.summary(time.perf_counter() - start)
+    summary["results"] = report.results
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a Werewolf tournament")
+    parser.add_argument("--games", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the first game")
+    parser.add_argument("--output", help="Write the full report as JSON to this path")
+    parser.add_argument("--verbose", action="store_true", help="Show game output")
+    parser.add_argument("--chat-backend", choices=["openai", "stub"])
+    parser.add_argument("--embedding-backend", choices=["openai", "hash"])
+    parser.add_argument("--decision-mode", choices=["agent", "structured"])
+    parser.add_argument(
+        "--llm-cache",
+        choices=["off", "record", "replay"],
+        help="Record chat responses, or replay recorded ones without calling a model",
+    )
+    parser.add_argument("--players", type=int, default=PLAYER_NUM)
+    parser.add_argument("--werewolves", type=int, default=WEREWOLF_NUM)
+    args = parser.parse_args()
+
+    summary = run_tournament(
+        args.games,
+        args.workers,
+        args.seed,
+        args.verbose,
+        args.chat_backend,
+        args.embedding_backend,
+        args.decision_mode,
+        args.llm_cache,
+        args.players,
+        args.werewolves,
+    )
+
+    print("\n==== TOURNAMENT REPORT ====")
+    print(f"Games: {summary['games']} ({summary['errors']} failed)")
+    for side, rate in sorted(summary["win_rates"].items()):
+        print(f"{side} win rate: {rate:.1%}")
+    print(f"Average days: {summary['average_days']:.2f}")
+    print(f"Average LLM calls: {summary['average_llm_calls']:.1f}")
+    print(f"Model calls per decision: {summary['decision_calls_per_decision']:.2f}")
+    if summary["average_llm_calls_saved_estimate"]:
+        print(
+            f"Average LLM calls saved (estimate, assuming {AGENT_CALLS_PER_DECISION} "
+            f"per agent decision): {summary['average_llm_calls_saved_estimate']:.1f}"
+        )
+    print(f"Throughput: {summary['games_per_minute']:.1f} games/min")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(summary, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from config import TRACE_DIR
+
+# The tracer of the game being played in this context, if tracing is enabled
+_tracer: ContextVar[Optional["Tracer"]] = ContextVar("tracer", default=None)
+# Row of the flame chart that spans are drawn on: the controller or a player
+_track: ContextVar[str] = ContextVar("trace_track", default="controller")
+
+
+class Tracer:
+    """Collects nested spans of one game and exports them as Chrome trace events.
+
+    Spans are complete ("X") events on one row per track: the controller
+    row holds the game and its phases, and each player gets a row for
+    their turns with the agent steps, tool calls and retrievals made
+    during them. The exported file opens in chrome://tracing or Perfetto.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.events: List[Dict] = []
+        self._origin = time.perf_counter()
+        self._tracks: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def now(self) -> float:
+        """Microseconds since the tracer was created"""
+        return (time.perf_counter() - self._origin) * 1e6
+
+    def add_span(
+        self, name: str, category: str, start: float, end: float, track: str, args: Dict
+    ):
+        with self._lock:
+            self.events.append({
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": start,
+                "dur": end - start,
+                "pid": os.getpid(),
+                "tid": self._track_id(track),
+                "args": args,
+            })
+
+    def export(self):
+        with open(self.path, "w", encoding="utf-8") as file:
+            json.dump({"traceEvents": self.events, "displayTimeUnit": "ms"}, file, default=str)
+
+    def _track_id(self, track: str) -> int:
+        if track not in self._tracks:
+            self._tracks[track] = len(self._tracks)
+            self.events.append({
+                "name": "thread_name",
+                "ph": "M",
+                "pid": os.getpid(),
+                "tid": self._tracks[track],
+                "args": {"name": track},
+            })
+        return self._tracks[track]
+
+
+@contextmanager
+def tracing(game_id: str, directory: Optional[str] = TRACE_DIR):
+    """Trace everything in this context to directory/<game_id>.trace.json"""
+    if not directory:
+        yield None
+        return
+
+    os.makedirs(directory, exist_ok=True)
+    tracer = Tracer(os.path.join(directory, f"{game_id}.trace.json"))
+    token = _tracer.set(tracer)
+    try:
+        yield tracer
+    finally:
+        _tracer.reset(token)
+        tracer.export()
+
+
+@contextmanager
+def span(name: str, category: str, track: Optional[str] = None, **args: Any):
+    """Time a block as a span; with track, the block and its children move to that row"""
+    tracer = _tracer.get()
+    if tracer is None:
+        yield
+        return
+
+    token = _track.set(track) if track else None
+    start = tracer.now()
+    try:
+        yield
+    finally:
+        tracer.add_span(name, category, start, tracer.now(), _track.get(), args)
+        if token is not None:
+            _track.reset(token)
+
+
+def traced(category: str):
+    """Decorator that records each call of a method as a span named after it"""
+
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            with span(function.__name__, category):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+class TraceCallback(BaseCallbackHandler):
+    """Records agent model steps and tool calls as spans of the current turn"""
+
+    # Run in the caller's context, so spans land on the right tracer and row
+    run_inline = True
+
+    def __init__(self):
+        self._open: Dict[UUID, tuple] = {}
+        self._lock = threading.Lock()
+
+    def on_chat_model_start(
+        self,
+        serialized: Dict[str, Any],
+        messages: List[List[Any]],
+        *,
+        run_id: UUID,
+        **kwargs: Any,
+    ):
+        self._start(run_id, "agent_step", "llm")
+
+    def on_llm_end(self, response: Any, *, run_id: UUID, **kwargs: Any):
+        self._end(run_id)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
+        self._end(run_id, error=repr(error))
+
+    def on_tool_start(
+        self, serialized: Dict[str, Any], input_str: str, *, run_id: UUID, **kwargs: Any
+    ):
+        self._start(run_id, (serialized or {}).get("name", "tool"), "tool", input=input_str)
+
+    def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any):
+        self._end(run_id)
+
+    def on_tool_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
+        self._end(run_id, error=repr(error))
+
+    def _start(self, run_id: UUID, name: str, category: str, **args: Any):
+        tracer = _tracer.get()
+        if tracer is not None:
+            with self._lock:
+                self._open[run_id] = (tracer, name, category, tracer.now(), _track.get(), args)
+
+    def _end(self, run_id: UUID, **args: Any):
+        with self._lock:
+            opened = self._open.pop(run_id, None)
+        if opened is not None:
+            tracer, name, category, start, track, start_args = opened
+            tracer.add_span(name, category, start, tracer.now(), track, {**start_args, **args})
@@ -0,0 +1,62 @@
+from typing import Dict, Iterator, List, Optional
+
+
+class Transcript:
+    """Append-only discussion transcript that renders each statement once.
+
+    Prompt builders read cached text windows (last N, full, one cycle)
+    instead of re-joining the statement list on every call. Windows are
+    rebuilt at most once per append and shared by every reader; closed
+    cycles are rendered once for the life of the transcript.
+    """
+
+    def __init__(self):
+        self.entries: List[Dict] = []
+        self._lines: List[str] = []
+        self._cycle_lines: Dict[int, List[str]] = {}
+        self._windows: Dict[tuple, str] = {}
+        self._closed_cycles: Dict[int, str] = {}
+
+    def append(self, player: str, message: str, cycle: Optional[int] = None):
+        self.entries.append({"player": player, "message": message, "cycle": cycle})
+
+        line = f"{player}: {message}"
+        self._lines.append(line)
+        if cycle is not None:
+            self._cycle_lines.setdefault(cycle, []).append(line)
+
+        # Only windows that include the newest line go stale
+        self._windows.clear()
+
+    def last(self, n: int) -> str:
+        """The last n statements, one "player: message" per line"""
+        key = ("last", n)
+        if key not in self._windows:
+            self._windows[key] = "\n".join(self._lines[-n:])
+        return self._windows[key]
+
+    def full(self) -> str:
+        """Every statement so far"""
+        if ("full",) not in self._windows:
+            self._windows[("full",)] = "\n".join(self._lines)
+        return self._windows[("full",)]
+
+    def cycle(self, cycle: int) -> str:
+        """Statements of one discussion cycle"""
+        if cycle in self._closed_cycles:
+            return self._closed_cycles[cycle]
+
+        text = "\n".join(self._cycle_lines.get(cycle, []))
+        latest = self.entries[-1]["cycle"] if self.entries else None
+        if latest is not None and cycle < latest:
+            self._closed_cycles[cycle] = text
+        return text
+
+    def cycles(self) -> List[int]:
+        return list(self._cycle_lines)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __iter__(self) -> Iterator[Dict]:
+        return iter(self.entries)
@@ -1,26 +1,26 @@
-import os
+from functools import lru_cache
 
+from prompt_registry import get_prompt_registry
 
-def load_prompts(filename: str, **kwargs):
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    prompts_dir = os.path.join(script_dir, "prompts")
-
-    prompt_path = os.path.join(prompts_dir, filename)
-
-    if not os.path.exists(prompt_path):
-        raise FileNotFoundError("Prompt file not found")
-
-    with open(prompt_path, "r", encoding="utf-8") as file:
-        prompt_template = file.read()
 
-    for key, value in kwargs.items():
-        placeholder = "{" + key + "}"
-
-        if isinstance(value, list):
-            replacement = ", ".join(str(item) for item in value)
-        else:
-            replacement = str(value)
-
-        prompt_template = prompt_template.replace(placeholder, replacement)
-
-    return prompt_template
+def load_prompts(filename: str, **kwargs):
+    """Render a prompts/ template, e.g. load_prompts("dumb_villager.txt", user_id="Bob")"""
+    name = filename[: -len(".txt")] if filename.endswith(".txt") else filename
+    return get_prompt_registry().render(name, **kwargs)
+
+
+def role_system_prompt(role: str, user_id: str) -> str:
+    """The system prompt identifying a player and their role"""
+    return _role_system_prompt(role, user_id, get_prompt_registry().version)
+
+
+@lru_cache(maxsize=4096)
+def _role_system_prompt(role: str, user_id: str, version: int) -> str:
+    # version is part of the key so reloaded templates are not served stale
+    if role == "werewolf":
+        return load_prompts(
+            "dumb_werewolf.txt",
+            user_id=user_id,
+            teammates="[teammates will be specified in each action]",
+        )
+    return load_prompts("dumb_villager.txt", user_id=user_id)
@@ -1,144 +1,122 @@
-from typing import Optional, Dict, List
+from typing import Optional, List
 from Player import Player, PlayerStatus, GameState  # Import GameState from Player
 from game_rag import GameRAG
-from langchain.chat_models import init_chat_model
-from langchain_core.tools import tool
 from langchain_core.messages import SystemMessage, HumanMessage
-from langgraph.prebuilt import create_react_agent
-from langgraph.checkpoint.memory import MemorySaver
-from utils import load_prompts
+from agent_factory import get_agent
+from config import CHAT_MODEL
+from transcript import Transcript
+from discussion_context import DiscussionContext
+from decision import ABSTAIN
+from prompt_registry import render_prompt
+
+VOTE_QUERY = "how to spot werewolves and who to vote out"
 
 
 class Villager(Player):
-    def __init__(self, user_id: str, rag: GameRAG, model_name="gpt-4o-mini"):
+    def __init__(self, user_id: str, rag: GameRAG, model_name=CHAT_MODEL):
         self.user_id = user_id
         self.rag = rag
         self.role_name = "villager"
         self.side = "villagers"
-        self.llm = init_chat_model(model_name, model_provider="openai")
-        self.memory = MemorySaver()
-
-        self.tools = [
-            self._create_rule_search_tool(),
-            self._create_villager_strategy_tool(),
-            self._create_conversation_search_tool(),
-        ]
-
-        system_prompt = load_prompts("dumb_villager.txt", user_id=self.user_id)
-
-        self.agent_executor = create_react_agent(
-            self.llm,
-            self.tools,
-            checkpointer=self.memory,
-            prompt=system_prompt,
-        )
-
-    def _create_rule_search_tool(self):
-        @tool
-        def search_rules(query: str):
-            """Search for game rules and mechanics"""
-            docs = self.rag.rule_vector_store.similarity_search(
-                query, k=2
-            )  # Fixed vector store
-            return "\n\n".join([doc.page_content for doc in docs])
-
-        return search_rules
-
-    def _create_villager_strategy_tool(self):
-        """Search for villager strategies and tactics"""
-
-        @tool
-        def search_villager_strategies(query: str):
-            """Search for villager strategies and tactics"""
-            docs = self.rag.villager_vector_store.similarity_search(query, k=2)
-            return "\n\n".join([doc.page_content for doc in docs])
-
-        return search_villager_strategies
-
-    def _create_conversation_search_tool(self):
-        @tool
-        def search_conversations(query: str):
-            """Search recent game conversations for relevant information"""
-            docs = self.rag.conversation_vector_store.similarity_search(query, k=3)
-            return "\n\n".join([doc.page_content for doc in docs])
-
-        return search_conversations
+        self.agent_executor = get_agent("villager", rag, model_name)
 
     def speak_in_discussion(
         self,
         game_state: GameState,
         round_num: int,
-        previous_statements: List[Dict[str, str]],
+        previous_statements: Transcript,
     ):
-        conversation_context = "\n".join([
-            f"{stmt['player']}: {stmt['message']}" for stmt in previous_statements[-10:]
-        ])
-
-        system_prompt = f"""DISCUSSION PHASE - Day {game_state["day_count"]}, Round {round_num}
-
-        Game State:
-            - Alive players: {game_state["alive_players"]}
-            - Last night's victim: {game_state["last_night_victim"]}
-            - Last eliminated by vote: {game_state["last_eliminated"]}
-
-        Recent conversation:
-            {conversation_context}
-
-        Task: Make this discussion engaging.
-        """
+        conversation_context = previous_statements.last(10)
+
+        system_prompt = render_prompt(
+            "villager_discussion",
+            day_count=game_state["day_count"],
+            round_num=round_num,
+            alive_players=game_state["alive_players"],
+            last_night_victim=game_state["last_night_victim"],
+            last_eliminated=game_state["last_eliminated"],
+            conversation=conversation_context,
+        )
 
-        config = {  # Fixed config structure
-            "configurable": {
-                "thread_id": f"villager_{self.user_id}_day_{game_state['day_count']}_round_{round_num}"
-            }
-        }
+        thread_id = f"villager_{self.user_id}_day_{game_state['day_count']}_round_{round_num}"
 
         messages = [  # Fixed variable name
             SystemMessage(content=system_prompt),
             HumanMessage(content="It's your turn to speak. What do you want to say?"),
         ]
 
-        for event in self.agent_executor.stream(
-            {"messages": messages}, config=config, stream_mode="values"
-        ):
-            response = event["messages"][-1].content
-
-        return response
-
-    def get_vote(self, game_state: GameState, discussion_history: List[Dict[str, str]]):
-        """Vote after hearing all discussion"""
-        conversation_context = "\n".join([
-            f"{stmt['player']}: {stmt['message']}" for stmt in discussion_history
-        ])
+        return self.run_agent(
+            messages, thread_id, phase="day_discussion", day=game_state["day_count"]
+        )
 
-        system_prompt = f"""VOTING PHASE - Day {game_state["day_count"]}
+    def get_vote(
+        self,
+        game_state: GameState,
+        discussion_history: DiscussionContext,
+        targets: Optional[List[str]] = None,
+    ):
+        """Vote after hearing all discussion; targets is the controller's cached list, if given"""
+        if targets is None:
+            targets = self._vote_targets(game_state)
+        messages, thread_id = self._vote_messages(game_state, discussion_history, targets)
+
+        return self.decide(
+            messages,
+            thread_id,
+            targets + [ABSTAIN],
+            VOTE_QUERY,
+            lambda response: self._extract_target(response, game_state["alive_players"]),
+            phase="day_vote",
+            day=game_state["day_count"],
+        )
 
-        Full discussion today:
-            {conversation_context}
+    async def aget_vote(
+        self,
+        game_state: GameState,
+        discussion_history: DiscussionContext,
+        targets: Optional[List[str]] = None,
+    ):
+        """Async counterpart of get_vote, used for concurrent ballot collection"""
+        if targets is None:
+            targets = self._vote_targets(game_state)
+        messages, thread_id = self._vote_messages(game_state, discussion_history, targets)
+
+        return await self.adecide(
+            messages,
+            thread_id,
+            targets + [ABSTAIN],
+            VOTE_QUERY,
+            lambda response: self._extract_target(response, game_state["alive_players"]),
+            phase="day_vote",
+            day=game_state["day_count"],
+        )
 
+    def _vote_targets(self, game_state: GameState) -> List[str]:
+        return [p for p in game_state["alive_players"] if p != self.user_id]
 
-        Available players to vote for: {[p for p in game_state["alive_players"] if p != self.user_id]}
+    def _vote_messages(
+        self,
+        game_state: GameState,
+        discussion_history: DiscussionContext,
+        targets: List[str],
+    ):
+        conversation_context = discussion_history.render()
 
-        Task: Choose one player to vote for elimination, or response with 'none' or 'abstain'.
-        """
+        system_prompt = render_prompt(
+            "villager_vote",
+            day_count=game_state["day_count"],
+            conversation=conversation_context,
+            targets=targets,
+        )
 
-        config = {
-            "configurable": {
-                "thread_id": f"villager_{self.user_id}_vote_{game_state['day_count']}"
-            }
-        }
+        thread_id = f"villager_{self.user_id}_vote_{game_state['day_count']}"
 
         messages = [
             SystemMessage(content=system_prompt),
             HumanMessage(content="Who do you vote to eliminate?"),
         ]
 
-        for event in self.agent_executor.stream(
-            {"messages": messages}, config=config, stream_mode="values"
-        ):
-            response = event["messages"][-1].content
-
-        return self._extract_target(response, game_state["alive_players"])
+        return messages, thread_id
 
     def _extract_target(self, response: str, alive_players: List[str]):
         response_lower = response.lower()  # Fixed variable name
@@ -156,7 +134,7 @@ class Villager(Player):
         return None
 
     def take_turn(self, game_state: GameState):
-        return self.speak_in_discussion(game_state, 1, [])
+        return self.speak_in_discussion(game_state, 1, Transcript())
 
     def get_description(self):
         return f"Villager {self.user_id} - trying to identify werewolves"
@@ -1,12 +1,14 @@
 from Player import Player, GameState
 from game_rag import GameRAG
-from langchain.chat_models import init_chat_model
 from langchain_core.messages import SystemMessage, HumanMessage
-from langgraph.checkpoint.memory import MemorySaver
-from langgraph.prebuilt import create_react_agent
-from langchain_core.tools import tool
-from typing import List, Dict, Optional, Any
-from utils import load_prompts
+from typing import List, Optional, Any
+from agent_factory import get_agent
+from transcript import Transcript
+from decision import ABSTAIN
+from prompt_registry import render_prompt
+
+VOTE_QUERY = "how to vote during the day without exposing the werewolf team"
+NIGHT_QUERY = "which villager to eliminate at night"
 
 
 class Werewolf(Player):
@@ -17,224 +19,176 @@ class Werewolf(Player):
         self.rag = rag
         self.role_name = role_name
         self.side = side
-        self.llm = init_chat_model("gpt-4o-mini", model_provider="openai")
-        self.memory = MemorySaver()
-
-        self.tools = [
-            self._create_rule_search_tool(),
-            self._create_werewolf_strategy_tool(),
-            self._create_conversation_search_tool(),
-        ]
-
-        system_prompt = load_prompts(
-            "dumb_werewolf.txt",
-            user_id=self.user_id,
-            teammates="[teammates will be specified in each action]",
-        )
-
-        self.agent_executor = create_react_agent(
-            self.llm,
-            self.tools,
-            checkpointer=self.memory,
-            prompt=system_prompt,
-        )
-
-    def _create_rule_search_tool(self):
-        @tool
-        def search_rules(query: str):
-            """Search for game rules and mechanics"""
-            docs = self.rag.rule_vector_store.similarity_search(query, k=2)
-            return "\n\n".join([doc.page_content for doc in docs])
-
-        return search_rules
-
-    def _create_werewolf_strategy_tool(self):
-        @tool
-        def search_werewolf_strategies(query: str):
-            """Search werewolf strategies"""
-            docs = self.rag.werewolf_vector_store.similarity_search(query, k=2)
-            return "\n\n".join([doc.page_content for doc in docs])
-
-        return search_werewolf_strategies
-
-    def _create_conversation_search_tool(self):
-        @tool
-        def search_conversations(query: str):
-            """Search recent game conversations"""
-            docs = self.rag.conversation_vector_store.similarity_search(query, k=3)
-            return "\n\n".join([doc.page_content for doc in docs])
-
-        return search_conversations
+        self.agent_executor = get_agent("werewolf", rag)
 
     def discuss_night_target(
         self,
         game_state: GameState,
         werewolf_teammates: List[str],
-        previous_discussion: List[Dict[str, str]],
+        previous_discussion: Transcript,
+        potential_targets: Optional[List[str]] = None,
     ):
         """Talk to werewolf team to decide who to eliminate"""
-        discussion_context = "\n".join([
-            f"{stmt['player']}: {stmt['message']}" for stmt in previous_discussion
-        ])
-
-        potential_targets = [
-            p
-            for p in game_state["alive_players"]
-            if p not in werewolf_teammates and p != self.user_id
-        ]
-
-        # Simplified prompt - just game state and task
-        system_prompt = f"""NIGHT DISCUSSION PHASE - Day {game_state["day_count"]}
-
-        Game State:
-            - Alive players: {game_state["alive_players"]}
-            - Your werewolf teammates: {werewolf_teammates}
-            - Potential targets: {potential_targets}
-
-        Previous team discussion:
-            {discussion_context}
-
-        Task: Discuss strategically with your werewolf team about who to eliminate tonight (2-3 sentences).
-        """
+        discussion_context = previous_discussion.full()
+
+        if potential_targets is None:
+            potential_targets = self._targets(game_state, werewolf_teammates)
+
+        system_prompt = render_prompt(
+            "werewolf_night_discussion",
+            day_count=game_state["day_count"],
+            alive_players=game_state["alive_players"],
+            teammates=werewolf_teammates or "none",
+            targets=potential_targets,
+            conversation=discussion_context,
+        )
 
-        config = {
-            "configurable": {
-                "thread_id": f"werewolf_{self.user_id}_team_discussion_night_{game_state['day_count']}"
-            }
-        }
+        thread_id = f"werewolf_{self.user_id}_team_discussion_night_{game_state['day_count']}"
 
         messages = [
             SystemMessage(content=system_prompt),
             HumanMessage(content="What are your thoughts on who to eliminate tonight?"),
         ]
 
-        for event in self.agent_executor.stream(
-            {"messages": messages}, config=config, stream_mode="values"
-        ):
-            response = event["messages"][-1].content
-
-        return response
+        return self.run_agent(
+            messages, thread_id, phase="night_discussion", day=game_state["day_count"]
+        )
 
     def speak_in_discussion(
         self,
         game_state: GameState,
         round_num: int,
-        previous_discussions: List[Dict[str, str]],
+        previous_discussions: Transcript,
         teammates: List[str],
     ):
         """Speak during the structured day discussion"""
         if not teammates:
             teammates = []
 
-        conversation_context = "\n".join([
-            f"{stmt['player']}: {stmt['message']}"
-            for stmt in previous_discussions[-10:]
-        ])
-
-        # Simplified prompt - just game state and task
-        system_prompt = f"""DISCUSSION PHASE - Day {game_state["day_count"]}, Round {round_num}
-
-        Game State:
-            - Alive players: {game_state["alive_players"]}
-            - Your werewolf teammates: {teammates}
-            - Last night's victim: {game_state.get("last_night_victim", "none")}
-            - Last eliminated by vote: {game_state.get("last_eliminated", "none")}
-
-        Recent conversation:
-            {conversation_context}
-
-        Task: Make a discussion statement while pretending to be a villager (2-3 sentences).
-        Remember: NEVER cast suspicion on your teammates: {teammates}
-        """
+        conversation_context = previous_discussions.last(10)
+
+        system_prompt = render_prompt(
+            "werewolf_discussion",
+            day_count=game_state["day_count"],
+            round_num=round_num,
+            alive_players=game_state["alive_players"],
+            teammates=teammates or "none",
+            last_night_victim=game_state.get("last_night_victim", "none"),
+            last_eliminated=game_state.get("last_eliminated", "none"),
+            conversation=conversation_context,
+        )
 
-        config = {
-            "configurable": {
-                "thread_id": f"werewolf_{self.user_id}_day_discussion_{game_state['day_count']}_round_{round_num}"
-            }
-        }
+        thread_id = f"werewolf_{self.user_id}_day_discussion_{game_state['day_count']}_round_{round_num}"
 
         messages = [
             SystemMessage(content=system_prompt),
             HumanMessage(content="It's your turn to speak. What do you want to say?"),
         ]
 
-        for event in self.agent_executor.stream(
-            {"messages": messages}, config=config, stream_mode="values"
-        ):
-            response = event["messages"][-1].content
-
-        return response
+        return self.run_agent(
+            messages, thread_id, phase="day_discussion", day=game_state["day_count"]
+        )
 
-    def get_vote(self, game_state: GameState, teammates: List[str]):
-        """Voting during day phase"""
-        # Simplified prompt - just game state and task
-        system_prompt = f"""VOTING PHASE - Day {game_state["day_count"]}
+    def get_vote(
+        self,
+        game_state: GameState,
+        teammates: List[str],
+        targets: Optional[List[str]] = None,
+    ):
+        """Voting during day phase; targets is the controller's cached list, if given"""
+        if targets is None:
+            targets = self._targets(game_state, teammates)
+        messages, thread_id = self._vote_messages(game_state, teammates, targets)
+
+        return self.decide(
+            messages,
+            thread_id,
+            targets + [ABSTAIN],
+            VOTE_QUERY,
+            lambda response: self._extract_target(response, game_state["alive_players"]),
+            phase="day_vote",
+            day=game_state["day_count"],
+        )
 
-        Game State:
-            - Alive players: {game_state["alive_players"]}
-            - Your werewolf teammates: {teammates}
+    async def aget_vote(
+        self,
+        game_state: GameState,
+        teammates: List[str],
+        targets: Optional[List[str]] = None,
+    ):
+        """Async counterpart of get_vote, used for concurrent ballot collection"""
+        if targets is None:
+            targets = self._targets(game_state, teammates)
+        messages, thread_id = self._vote_messages(game_state, teammates, targets)
+
+        return await self.adecide(
+            messages,
+            thread_id,
+            targets + [ABSTAIN],
+            VOTE_QUERY,
+            lambda response: self._extract_target(response, game_state["alive_players"]),
+            phase="day_vote",
+            day=game_state["day_count"],
+        )
 
-        Available players to vote for: {[p for p in game_state["alive_players"] if p != self.user_id and p not in teammates]}
+    def _targets(self, game_state: GameState, teammates: List[str]) -> List[str]:
+        excluded = {self.user_id, *teammates}
+        return [p for p in game_state["alive_players"] if p not in excluded]
 
-        Task: Choose one villager to vote for elimination, or respond with 'none' to abstain.
-        Remember: NEVER vote for your werewolf teammates: {teammates}
-        """
+    def _vote_messages(
+        self, game_state: GameState, teammates: List[str], targets: List[str]
+    ):
+        system_prompt = render_prompt(
+            "werewolf_vote",
+            day_count=game_state["day_count"],
+            alive_players=game_state["alive_players"],
+            teammates=teammates or "none",
+            targets=targets,
+        )
 
-        config = {
-            "configurable": {
-                "thread_id": f"werewolf_{self.user_id}_vote_{game_state['day_count']}"
-            }
-        }
+        thread_id = f"werewolf_{self.user_id}_vote_{game_state['day_count']}"
 
         messages = [
             SystemMessage(content=system_prompt),
             HumanMessage(content="Who do you vote to eliminate?"),
         ]
 
-        for event in self.agent_executor.stream(
-            {"messages": messages}, config=config, stream_mode="values"
-        ):
-            final_response = event["messages"][-1].content
-
-        return self._extract_target(final_response, game_state["alive_players"])
+        return messages, thread_id
 
-    def get_night_action(self, game_state: GameState, teammates: List[str] = []):
+    def get_night_action(
+        self,
+        game_state: GameState,
+        teammates: List[str] = [],
+        potential_targets: Optional[List[str]] = None,
+    ):
         """Make a final decision on who to eliminate (used when only one werewolf left)"""
-        potential_targets = [
-            p
-            for p in game_state["alive_players"]
-            if p != self.user_id and p not in teammates
-        ]
-
-        # Simplified prompt - just game state and task
-        system_prompt = f"""NIGHT ACTION PHASE - Day {game_state["day_count"]}
-
-        Game State:
-            - Alive players: {game_state["alive_players"]}
-            - Your werewolf teammates: {teammates}
-            - Potential targets: {potential_targets}
-
-        Task: Choose one villager to eliminate tonight.
-        Remember: NEVER target your werewolf teammates: {teammates}
-        """
+        if potential_targets is None:
+            potential_targets = self._targets(game_state, teammates)
+
+        system_prompt = render_prompt(
+            "werewolf_night_action",
+            day_count=game_state["day_count"],
+            alive_players=game_state["alive_players"],
+            teammates=teammates or "none",
+            targets=potential_targets,
+        )
 
-        config = {
-            "configurable": {
-                "thread_id": f"werewolf_{self.user_id}_solo_night_{game_state['day_count']}"
-            }
-        }
+        thread_id = f"werewolf_{self.user_id}_solo_night_{game_state['day_count']}"
 
         messages = [
             SystemMessage(content=system_prompt),
             HumanMessage(content="Who do you want to eliminate tonight?"),
         ]
 
-        for event in self.agent_executor.stream(
-            {"messages": messages}, config=config, stream_mode="values"
-        ):
-            final_response = event["messages"][-1].content
-
-        return self._extract_target(final_response, game_state["alive_players"])
+        return self.decide(
+            messages,
+            thread_id,
+            potential_targets,
+            NIGHT_QUERY,
+            lambda response: self._extract_target(response, game_state["alive_players"]),
+            phase="night_vote",
+            day=game_state["day_count"],
+        )
 
     def _extract_target(self, response: str, alive_players: list):
         """Extract target player from LLM response"""
@@ -250,7 +204,7 @@ class Werewolf(Player):
         return None
 
     def take_turn(self, game_state: GameState):
-        return self.speak_in_discussion(game_state, 1, [], [])
+        return self.speak_in_discussion(game_state, 1, Transcript(), [])
 
     def get_description(self):
         return (